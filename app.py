@@ -1,17 +1,18 @@
 import streamlit as st
-import qrcode
 import os
-import cv2
-import numpy as np
-from pyzbar.pyzbar import decode
-from datetime import datetime
-import uuid
-from PIL import Image
-import pandas as pd
-import numpy as np
-from io import BytesIO
-from supabase import create_client, Client
-
+from datetime import datetime, timedelta
+import time
+import tempfile
+from functools import partial
+from pathlib import Path
+from supabase import create_client
+from metrics import InstrumentedSupabase, observe, span, start_exporters_from_env
+from product_cache import ProductCache
+from product_lookup import SupabaseProductLookup
+from id_allocator import BlockIdAllocator
+
+# Dependências pesadas (cv2, pyzbar, pandas, qrcode, PIL) são importadas só pela página que as usa.
+# Depois da primeira importação ficam em sys.modules, então os reruns não pagam o custo de novo.
 
 # Configurações do Supabase
 
@@ -19,7 +20,13 @@ supabase_url = st.secrets.supabase.supabase_url
 supabase_key = st.secrets.supabase.supabase_key
 bucket_name = st.secrets.supabase.bucket_name
 
-supabase: Client = create_client(supabase_url, supabase_key)
+# Cliente criado uma única vez por processo e compartilhado entre reruns e sessões
+@st.cache_resource(show_spinner=False)
+def get_supabase_client():
+    # Cada chamada ao Supabase é medida (ver metrics.py)
+    return InstrumentedSupabase(create_client(supabase_url, supabase_key))
+
+supabase = get_supabase_client()
 
 # Configuração de categorias
 CATEGORIAS = {
@@ -32,76 +39,273 @@ CATEGORIAS = {
     "nexteducation": 400001
 }
 
+# Paginação da listagem de produtos
+PAGE_SIZE = 20
+PAGE_SIZES = [10, 20, 50, 100]
+
+# Páginas da listagem mantidas em cache: validade (segundos) e quantidade máxima.
+# Cadastro, importação e exclusão limpam o cache explicitamente; a validade cobre
+# alterações feitas por outros processos.
+LIST_CACHE_TTL = 60
+LIST_CACHE_ENTRIES = 200
+
+# Quantidade máxima de PNGs de QR Code mantidos em cache local
+QR_CACHE_ENTRIES = 1000
+
+# Quantidade de IDs reservados no servidor a cada ida ao banco
+ID_BLOCK_SIZE = 20
+
+# Quadros analisados por segundo na leitura contínua de vídeo (padrão)
+VIDEO_SCAN_FPS = 8
+
+# Duração máxima (segundos) da leitura de um stream ou câmera
+VIDEO_MAX_SECONDS = 300
+
+# Cache de produtos da leitura de QR Code: quantidade máxima e validade (segundos)
+PRODUCT_CACHE_ENTRIES = 2048
+PRODUCT_CACHE_TTL = 300
+
+# Quantidade máxima de IDs por consulta em lote
+BULK_QUERY_CHUNK = 200
+
+# Produtos buscados por consulta ao percorrer a tabela inteira (etiquetas, exportação)
+EXPORT_PAGE_SIZE = 500
+
+# Intervalo (segundos) de atualização do andamento das tarefas em segundo plano
+JOB_POLL_SECONDS = 2
+
+# Colunas disponíveis na exportação do catálogo
+EXPORT_COLUMNS = ["id", "category", "name", "description", "price", "creation_date",
+                  "image_url", "thumbnail_url", "medium_url", "qr_code_url"]
+
 st.set_page_config(page_title="Catálogo de Produtos", page_icon="📦")
 
 # Funções do Banco de Dados
-def insert_product(product_id, category, name, description, price, creation_date, image_url, qr_code_url):
-    try:
-        response = supabase.table('products').insert({
-            "id": product_id,
-            "category": category,
-            "name": name,
-            "description": description,
-            "price": price,
-            "creation_date": creation_date,
-            "image_url": image_url,
-            "qr_code_url": qr_code_url
-        }).execute()
-        return response
-    except Exception as e:
-        st.error(f"Erro ao inserir produto: {str(e)}")
-        return None
-
 def get_product(product_id):
     try:
-        response = supabase.table('products').select("*").eq("id", product_id).execute()
-        return response.data[0] if response.data else None
+        return get_product_lookup().get(product_id)
     except Exception as e:
         st.error(f"Erro ao buscar produto: {str(e)}")
         return None
 
-def get_all_products():
+def get_products(product_ids):
+    # Busca vários produtos de uma vez, em vez de uma consulta por ID; só vai ao banco o que não está em cache
     try:
-        response = supabase.table('products').select("*").order("creation_date", desc=True).execute()
-        return response.data
+        return get_product_lookup().get_many(product_ids)
     except Exception as e:
         st.error(f"Erro ao buscar produtos: {str(e)}")
-        return []
-
-# Funções de Upload
-def upload_image(image_file, product_id):
+        return {}
+
+# Paginação por keyset em (creation_date, id): cada página continua a partir do último item da anterior.
+# O resultado fica em cache; fetch_products_page.clear() invalida tudo após qualquer alteração.
+@st.cache_data(ttl=LIST_CACHE_TTL, max_entries=LIST_CACHE_ENTRIES, show_spinner=False)
+def fetch_products_page(category, cursor, page_size, search=None):
+    # Com busca, o resultado vem ordenado por relevância e o cursor é a posição no ranking
+    if search:
+        return get_product_search().page(search, cursor or 0, page_size, category=category)
+    query = supabase.table('products').select("*")
+    if category:
+        query = query.eq("category", category)
+    if cursor:
+        last_date, last_id = cursor
+        query = query.or_(f'creation_date.lt."{last_date}",'
+                          f'and(creation_date.eq."{last_date}",id.lt.{last_id})')
+    response = query.order("creation_date", desc=True) \
+        .order("id", desc=True) \
+        .limit(page_size + 1) \
+        .execute()
+
+    rows = response.data
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1]['creation_date'], rows[-1]['id'])
+    return rows, next_cursor
+
+def get_products_page(category=None, cursor=None, page_size=PAGE_SIZE, search=None):
     try:
-        file_extension = image_file.name.split('.')[-1]
-        file_path = f"{product_id}.{file_extension}"
-
-        res = supabase.storage.from_(bucket_name).upload(
-            path=file_path,
-            file=image_file.getvalue(),
-            file_options={"content-type": image_file.type}
-        )
-        return supabase.storage.from_(bucket_name).get_public_url(file_path)
+        return fetch_products_page(category, cursor, page_size, search)
     except Exception as e:
-        st.error(f"Erro no upload da imagem: {str(e)}")
-        return None
-
-def upload_qr_code(qr_bytes, product_id):
+        st.error(f"Erro ao buscar produtos: {str(e)}")
+        return [], None
+
+# Percorre todos os produtos do filtro em páginas de keyset, sem carregar a tabela inteira.
+# date_from/date_to são datas (date_to inclusive). Fora do cache: usado por geração em massa.
+def iter_products(category=None, date_from=None, date_to=None, page_size=EXPORT_PAGE_SIZE, columns=None):
+    # id e creation_date sempre vêm junto: são o cursor
+    select = ",".join(dict.fromkeys(["id", "creation_date", *columns])) if columns else "*"
+    cursor = None
+    while True:
+        query = supabase.table('products').select(select)
+        if category:
+            query = query.eq("category", category)
+        if date_from:
+            query = query.gte("creation_date", date_from.strftime("%Y-%m-%d"))
+        if date_to:
+            query = query.lt("creation_date", (date_to + timedelta(days=1)).strftime("%Y-%m-%d"))
+        if cursor:
+            last_date, last_id = cursor
+            query = query.or_(f'creation_date.lt."{last_date}",'
+                              f'and(creation_date.eq."{last_date}",id.lt.{last_id})')
+        rows = query.order("creation_date", desc=True) \
+            .order("id", desc=True) \
+            .limit(page_size) \
+            .execute() \
+            .data
+        yield from rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1]['creation_date'], rows[-1]['id'])
+
+# Download sob demanda do QR Code, com cache local dos bytes
+@st.cache_data(max_entries=QR_CACHE_ENTRIES, show_spinner=False)
+def download_qr_code(product_id):
     try:
-        file_path = f"{product_id}_qrcode.png"
-        res = supabase.storage.from_(bucket_name).upload(
-            path=file_path,
-            file=qr_bytes,
-            file_options={"content-type": "image/png"}
+        return supabase.storage.from_(bucket_name).download(f"{product_id}_qrcode.png")
+    except Exception:
+        # O QR Code é determinístico: se o objeto não estiver no storage, basta gerá-lo novamente
+        from qr_render import render_profile_png
+        return render_profile_png(str(product_id))
+
+
+# Decodificador criado uma única vez por processo e reaproveitado entre reruns e sessões
+@st.cache_resource(show_spinner=False)
+def get_qr_decoder():
+    from qr_decoder import QRDecoder
+    return QRDecoder()
+
+
+# Alocador de IDs compartilhado por todas as sessões, para que os blocos reservados não se repitam
+@st.cache_resource(show_spinner=False)
+def get_id_allocator():
+    return BlockIdAllocator(supabase, CATEGORIAS, block_size=ID_BLOCK_SIZE)
+
+
+# Cache de produtos compartilhado por todas as sessões (leituras repetidas não vão ao banco)
+@st.cache_resource(show_spinner=False)
+def get_product_cache():
+    return ProductCache(max_entries=PRODUCT_CACHE_ENTRIES, ttl=PRODUCT_CACHE_TTL)
+
+
+# Busca de produtos com cache, a mesma usada pelo serviço HTTP (scan_service.py)
+@st.cache_resource(show_spinner=False)
+def get_product_lookup():
+    return SupabaseProductLookup(supabase, get_product_cache(), chunk_size=BULK_QUERY_CHUNK)
+
+
+# Busca textual da listagem (função search_products do sql/005_products_search.sql)
+@st.cache_resource(show_spinner=False)
+def get_product_search():
+    from product_search import SupabaseProductSearch
+    return SupabaseProductSearch(supabase)
+
+
+# Pool de threads do cadastro, compartilhado entre sessões
+@st.cache_resource(show_spinner=False)
+def get_create_pipeline():
+    from create_pipeline import CreatePipeline
+    return CreatePipeline(supabase, bucket_name)
+
+
+# Pool de processos para leitura em lote, mantido entre reruns
+@st.cache_resource(show_spinner=False)
+def get_batch_scanner():
+    from batch_scan import BatchScanner
+    return BatchScanner()
+
+
+# Imagens endereçadas pelo conteúdo, compartilhadas entre produtos com a mesma foto
+@st.cache_resource(show_spinner=False)
+def get_image_store():
+    from image_store import ImageStore
+    return ImageStore(supabase, bucket_name)
+
+
+# Thread das tarefas longas (limpeza do storage, exportação do catálogo), que rodam fora da
+# renderização da página
+@st.cache_resource(show_spinner=False)
+def get_background_executor():
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=1)
+
+
+# Exportação do catálogo (roda na thread de segundo plano): as páginas do filtro vão direto
+# para o arquivo. progress["rows"] acompanha o andamento.
+def export_catalog(path, columns, export_format, progress, **filters):
+    from catalog_export import write_export
+    rows = iter_products(columns=columns, **filters)
+    with open(path, "wb") as out:
+        return write_export(rows, out, columns, export_format,
+                            on_progress=lambda written: progress.update(rows=written))
+
+
+# Exclusão do produto: linha, imagens, variantes e QR Code, e os caches que os referenciam
+def delete_product(product):
+    supabase.table('products').delete().eq('id', product['id']).execute()
+
+    # A imagem só sai do bucket se nenhum outro produto usar a mesma foto
+    file_paths = get_image_store().unreferenced_paths(product)
+    file_paths.append(f"{product['id']}_qrcode.png")
+    supabase.storage.from_(bucket_name).remove(file_paths)
+    download_qr_code.clear(product['id'])
+    get_product_cache().invalidate(product['id'])
+    fetch_products_page.clear()
+
+
+# Controles de cada card da listagem num fragmento: baixar o QR Code, clicar em "Excluir" ou
+# "Cancelar" reexecuta só este card, sem buscar e redesenhar o catálogo inteiro.
+# Só a exclusão confirmada reexecuta o app, porque a página muda de composição.
+@st.fragment
+def product_card_controls(product):
+    if product.get('qr_code_url'):
+        # Os bytes só são obtidos quando o usuário clica no botão
+        st.download_button(
+            label="⬇️ QR Code",
+            data=partial(download_qr_code, product['id']),
+            file_name=f"qr_{product['name']}.png",
+            mime="image/png",
+            key=f"qr_{product['id']}",
+            on_click="ignore"
         )
-        return supabase.storage.from_(bucket_name).get_public_url(file_path)
-    except Exception as e:
-        st.error(f"Erro no upload do QR code: {str(e)}")
-        return None
+
+    confirm_key = f"confirm_delete_{product['id']}"
+    if st.button("🗑️ Excluir", key=f"del_{product['id']}", type="secondary"):
+        st.session_state[confirm_key] = True
+
+    if st.session_state.get(confirm_key):
+        st.warning("Tem certeza que deseja excluir este produto permanentemente?")
+        col_confirm, col_cancel = st.columns(2)
+
+        with col_confirm:
+            if st.button("✅ Confirmar Exclusão", key=f"confirm_{product['id']}"):
+                try:
+                    delete_product(product)
+                    del st.session_state[confirm_key]
+                    st.success("Produto excluído com sucesso!")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Erro ao excluir produto: {str(e)}")
+
+        with col_cancel:
+            if st.button("❌ Cancelar", key=f"cancel_{product['id']}"):
+                del st.session_state[confirm_key]
+                st.rerun(scope="fragment")
+
 
 # Interface Principal
 st.sidebar.title("Navegação")
-page = st.sidebar.radio("Selecione a página:", ["Gerar QR Code", "Ler QR Code", "Ver Produtos Cadastrados"])
+page = st.sidebar.radio("Selecione a página:", ["Gerar QR Code", "Importar em Lote", "Ler QR Code",
+                                                "Ver Produtos Cadastrados", "Etiquetas", "Exportar Catálogo",
+                                                "Manutenção"])
+
+# Exportação das métricas (Prometheus/JSON lines) e tempo total desta execução
+start_exporters_from_env()
+run_started = time.perf_counter()
 
 if page == "Gerar QR Code":
+    from qr_render import render_profile_png, render_profile_svg
+    from create_pipeline import CreatePipelineError
+
     st.title("📷 Gerador de QR Code para Produtos")
 
     if 'generated' not in st.session_state:
@@ -133,44 +337,37 @@ if page == "Gerar QR Code":
                 st.session_state.generated = False
             else:
                 try:
-                    # Obter último ID da categoria
-                    response = supabase.table('products') \
-                        .select('id') \
-                        .eq('category', category) \
-                        .order('id', desc=True) \
-                        .limit(1) \
-                        .execute()
-
-                    last_id = response.data[0]['id'] if response.data else None
-                    next_id = last_id + 1 if last_id else CATEGORIAS[category]
-
-                    product_id = next_id
-                    image_url = upload_image(image_file, product_id)
-
-                    if image_url:
-                        qr = qrcode.make(str(product_id))
-                        img_buffer = BytesIO()
-                        qr.save(img_buffer, format="PNG")
-                        qr_bytes = img_buffer.getvalue()
-                        qr_code_url = upload_qr_code(qr_bytes, product_id)
-
-                        if qr_code_url:
-                            insert_product(
-                                product_id=product_id,
-                                category=category,
-                                name=name,
-                                description=description,
-                                price=float(price),
-                                creation_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                image_url=image_url,
-                                qr_code_url=qr_code_url
-                            )
-
-                            st.session_state.qr_bytes = qr_bytes
-                            st.session_state.product_name = name
-                            st.session_state.generated = True
-                            st.success("✅ Produto cadastrado com sucesso!")
+                    product_id = get_id_allocator().next_id(category)
+
+                    # Uploads e insert em paralelo; em caso de falha nada fica gravado
+                    _, image_report = get_create_pipeline().create(
+                        row={
+                            "id": product_id,
+                            "category": category,
+                            "name": name,
+                            "description": description,
+                            "price": float(price),
+                            "creation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        },
+                        image_bytes=image_file.getvalue(),
+                        qr_payload=str(product_id)
+                    )
+
+                    get_product_cache().invalidate(product_id)
+                    fetch_products_page.clear()
+                    st.session_state.qr_bytes = render_profile_png(str(product_id))
+                    st.session_state.qr_svg = render_profile_svg(str(product_id))
+                    st.session_state.product_name = name
+                    st.session_state.generated = True
+                    st.success("✅ Produto cadastrado com sucesso!")
+                    if image_report['stored_bytes']:
+                        st.caption(f"Imagem otimizada: {image_report['original_bytes'] / 1024:.0f} KB → "
+                                   f"{image_report['stored_bytes'] / 1024:.0f} KB")
+                    else:
+                        st.caption("Imagem já existente no storage: upload evitado")
 
+                except CreatePipelineError as e:
+                    st.error(f"Erro ao cadastrar produto: {str(e)}")
                 except Exception as e:
                     st.error(f"Erro ao gerar ID do produto: {str(e)}")
 
@@ -181,56 +378,226 @@ if page == "Gerar QR Code":
             file_name=f"qr_code_{st.session_state.product_name}.png",
             mime="image/png"
         )
+        st.download_button(
+            label="Baixar QR Code (SVG)",
+            data=st.session_state.qr_svg,
+            file_name=f"qr_code_{st.session_state.product_name}.svg",
+            mime="image/svg+xml"
+        )
 
-elif page == "Ler QR Code":
-    st.title("🔍 Leitor de QR Code")
+elif page == "Importar em Lote":
+    import pandas as pd
+    from bulk_import import BulkImporter, ImageArchive, read_products_csv
 
-    detected_data = None
-    scan_method = st.radio("Escolha o método de leitura:", ["Usar Câmera", "Upload de Imagem"])
+    st.title("📥 Importação de Produtos em Lote")
+    st.caption("CSV com as colunas `category`, `name`, `description`, `price` e `image` "
+               "(nome do arquivo da imagem dentro do ZIP).")
 
-    def decode_qr(image):
+    csv_file = st.file_uploader("Arquivo CSV*", type=['csv'])
+    archive_file = st.file_uploader("Arquivo ZIP com as imagens*", type=['zip'])
+
+    if csv_file and archive_file and st.button("📥 Importar produtos"):
         try:
-            if image.dtype == bool:
-                image = image.astype(np.uint8) * 255
+            rows = read_products_csv(csv_file)
+            archive = ImageArchive(archive_file)
+        except Exception as e:
+            st.error(f"Erro ao ler os arquivos: {str(e)}")
+            rows = []
+
+        # Validação de cada linha antes de qualquer upload
+        products = []
+        invalid = []
+        creation_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for line, row in enumerate(rows, start=2):
+            try:
+                price = float(row['price'].replace(',', '.'))
+            except ValueError:
+                price = None
+
+            if row['category'] not in CATEGORIAS:
+                invalid.append({"Linha": line, "Erro": f"Categoria inválida: {row['category']}"})
+            elif not row['name'] or len(row['name']) > 50:
+                invalid.append({"Linha": line, "Erro": "Nome ausente ou com mais de 50 caracteres"})
+            elif price is None or price < 0:
+                invalid.append({"Linha": line, "Erro": f"Valor inválido: {row['price']}"})
+            elif row['image'] not in archive:
+                invalid.append({"Linha": line, "Erro": f"Imagem não encontrada no ZIP: {row['image']}"})
+            else:
+                products.append({**row, "price": price, "creation_date": creation_date})
 
-            if len(image.shape) == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        if invalid:
+            st.warning(f"{len(invalid)} linhas ignoradas")
+            st.dataframe(pd.DataFrame(invalid), use_container_width=True)
 
-            decoded_objects = decode(image)
-            if decoded_objects:
-                return decoded_objects[0].data.decode('utf-8')
+        if products:
+            try:
+                # IDs de cada categoria numa só chamada ao alocador (no máximo uma reserva no servidor)
+                by_category = {}
+                for product in products:
+                    by_category.setdefault(product['category'], []).append(product)
+                for category, category_products in by_category.items():
+                    ids = get_id_allocator().take(category, len(category_products))
+                    for product, product_id in zip(category_products, ids):
+                        product['id'] = product_id
+
+                progress = st.progress(0.0, text="Enviando imagens e QR Codes...")
+                report = BulkImporter(supabase, bucket_name).run(
+                    products,
+                    archive,
+                    on_progress=lambda done, total: progress.progress(
+                        done / total, text=f"{done}/{total} produtos enviados")
+                )
+
+                for product in products:
+                    get_product_cache().invalidate(product['id'])
+                fetch_products_page.clear()
+
+                st.success(f"✅ {report['inserted']} produtos cadastrados com sucesso!")
+                st.caption(f"Imagens: {report['bytes_saved'] / 1024 / 1024:.1f} MB economizados "
+                           f"(normalização e fotos repetidas)")
+                if report['failed']:
+                    st.error(f"{len(report['failed'])} produtos não puderam ser cadastrados")
+                    st.dataframe(pd.DataFrame(report['failed']), use_container_width=True)
+            except Exception as e:
+                st.error(f"Erro na importação: {str(e)}")
 
-            detector = cv2.QRCodeDetector()
-            data, _, _ = detector.detectAndDecode(image)
-            return data if data else None
+elif page == "Ler QR Code":
+    from qr_decoder import load_grayscale
+    from qr_render import render_profile_array
 
-        except Exception as e:
-            st.error(f"Erro no processamento: {str(e)}")
-            return None
+    st.title("🔍 Leitor de QR Code")
+
+    detected_data = None
+    scan_method = st.radio("Escolha o método de leitura:", ["Usar Câmera", "Upload de Imagem", "Lote de Imagens",
+                                                            "Vídeo Contínuo"])
 
     if scan_method == "Usar Câmera":
         camera_image = st.camera_input("Aponte a câmera para o QR Code")
         if camera_image:
             try:
-                image = np.array(Image.open(camera_image).convert('L'))
-                detected_data = decode_qr(image)
+                image = load_grayscale(camera_image)
+                detected_data = get_qr_decoder().decode_first(image)
             except Exception as e:
                 st.error(f"Erro na leitura: {str(e)}")
                 detected_data = None
-    else:
+    elif scan_method == "Upload de Imagem":
         uploaded_file = st.file_uploader("Carregue uma imagem com QR Code", type=['jpg', 'jpeg', 'png'])
         if uploaded_file:
             try:
-                image = np.array(Image.open(uploaded_file).convert('L'))
-                detected_data = decode_qr(image)
+                image = load_grayscale(uploaded_file)
+                detected_data = get_qr_decoder().decode_first(image)
             except Exception as e:
                 st.error(f"Erro na leitura: {str(e)}")
                 detected_data = None
+    elif scan_method == "Vídeo Contínuo":
+        import pandas as pd
+        from video_scan import VideoScanner, iter_frames
+
+        # Leitura contínua: cada produto que aparece no vídeo é reportado uma vez, sem clicar a cada leitura
+        video_file = st.file_uploader("Carregue um vídeo gravado", type=['mp4', 'avi', 'mov', 'mkv', 'mjpeg'])
+        stream_url = st.text_input("Ou informe a URL do stream (MJPEG/RTSP) ou o número da câmera")
+        max_fps = st.slider("Quadros analisados por segundo", 1, 15, VIDEO_SCAN_FPS)
+        if (video_file or stream_url.strip()) and st.button("▶️ Iniciar leitura"):
+            source = stream_url.strip()
+            temp_path = None
+            if video_file:
+                # O OpenCV só abre vídeos a partir de um caminho
+                with tempfile.NamedTemporaryFile(suffix=os.path.splitext(video_file.name)[1], delete=False) as temp:
+                    temp.write(video_file.getvalue())
+                source = temp_path = temp.name
+
+            status = st.empty()
+            table = st.empty()
+            rows = []
+            scanner = VideoScanner(decoder=get_qr_decoder())
+            # Streams e câmeras não terminam sozinhos: a leitura dura no máximo VIDEO_MAX_SECONDS, e o
+            # status é atualizado a cada poucos quadros mesmo sem leituras, porque o Streamlit só
+            # interrompe o script (rerun, troca de página) numa chamada st.*
+            frames = iter_frames(source, max_fps=max_fps, max_seconds=None if video_file else VIDEO_MAX_SECONDS)
+            try:
+                for detection in scanner.scan(frames, on_progress=lambda stats: status.caption(
+                        f"{stats['frames']} quadros analisados, {stats['duplicates']} repetidos ignorados")):
+                    code = detection['code'].strip()
+                    product = get_product(int(code)) if code.isdigit() else None
+                    rows.append({
+                        "Tempo (s)": round(detection['timestamp'], 1),
+                        "ID": code,
+                        "Produto": product['name'] if product else "Não encontrado",
+                        "Categoria": product['category'].upper() if product else "",
+                        "Valor": product.get('price') if product else None
+                    })
+                    table.dataframe(pd.DataFrame(rows), use_container_width=True)
+                    status.caption(f"{scanner.stats['frames']} quadros analisados, "
+                                   f"{scanner.stats['duplicates']} repetidos ignorados")
+            except Exception as e:
+                st.error(f"Erro na leitura do vídeo: {str(e)}")
+            finally:
+                # Libera a captura também quando o script é interrompido
+                frames.close()
+                if temp_path:
+                    os.remove(temp_path)
+
+            st.success(f"✅ {len(rows)} leituras em {scanner.stats['frames']} quadros analisados "
+                       f"({scanner.stats['duplicates']} repetidos ignorados)")
+    else:
+        import pandas as pd
+        from batch_scan import iter_images
+
+        batch_files = st.file_uploader(
+            "Carregue várias imagens ou arquivos ZIP",
+            type=['jpg', 'jpeg', 'png', 'zip'],
+            accept_multiple_files=True
+        )
+        if batch_files and st.button("🔍 Processar lote"):
+            status = st.empty()
+            table = st.empty()
+            scanned = []
+            last_refresh = 0.0
+
+            # Resultados exibidos à medida que cada imagem termina
+            for result in get_batch_scanner().scan(iter_images(batch_files)):
+                scanned.append(result)
+                status.caption(f"{result['processed']} imagens processadas — "
+                               f"{result['throughput']:.1f} imagens/s")
+                if time.monotonic() - last_refresh >= 0.5:
+                    last_refresh = time.monotonic()
+                    table.dataframe(pd.DataFrame([{
+                        "Arquivo": r['name'],
+                        "QR Codes": ", ".join(r['results']) or "—",
+                        "Erro": r['error'] or ""
+                    } for r in scanned]), use_container_width=True)
+
+            # Uma única consulta para todos os IDs detectados
+            detected_ids = {int(code.strip()) for r in scanned for code in r['results'] if code.strip().isdigit()}
+            products = get_products(detected_ids)
+
+            rows = []
+            found = 0
+            for r in scanned:
+                for code in r['results'] or [None]:
+                    product = products.get(int(code.strip())) if code and code.strip().isdigit() else None
+                    found += product is not None
+                    rows.append({
+                        "Arquivo": r['name'],
+                        "ID": code or "—",
+                        "Produto": product['name'] if product else
+                        ("Não encontrado" if code else r['error'] or "Nenhum QR Code detectado"),
+                        "Categoria": product['category'].upper() if product else "",
+                        "Valor": product.get('price') if product else None
+                    })
+
+            table.dataframe(pd.DataFrame(rows), use_container_width=True)
+            if scanned:
+                st.success(f"✅ {len(scanned)} imagens processadas, {found} produtos encontrados "
+                           f"({scanned[-1]['throughput']:.1f} imagens/s)")
+            else:
+                st.info("Nenhuma imagem encontrada nos arquivos enviados.")
 
     if detected_data:
         try:
             product_id = int(detected_data.strip())
-            product = get_product(product_id)
+            with span("scan.lookup"):
+                product = get_product(product_id)
 
             if product:
                 st.success("✅ QR Code detectado com sucesso!")
@@ -240,13 +607,12 @@ elif page == "Ler QR Code":
 
                 with col1:
                     st.image(
-                        product['image_url'],
+                        product.get('medium_url') or product['image_url'],
                         caption="Foto do Produto",
                         use_container_width=True
                     )
-                    qr_img = qrcode.make(str(product_id))
                     st.image(
-                        np.array(qr_img.convert("RGB")),
+                        render_profile_array(str(product_id)),
                         caption="QR Code do Produto",
                         use_container_width=True
                     )
@@ -284,22 +650,50 @@ elif page == "Ler QR Code":
             st.write("Detalhes técnicos:", detected_data)
 
 elif page == "Ver Produtos Cadastrados":
+    import pandas as pd
+
     st.title("📦 Produtos Cadastrados")
 
-    selected_category = st.selectbox(
-        "Filtrar por categoria:",
-        options=["Todas"] + list(CATEGORIAS.keys())
-    )
+    search = st.text_input("🔍 Buscar por nome ou descrição:").strip()
 
-    products = get_all_products()
+    col_filter, col_size = st.columns([3, 1])
+    with col_filter:
+        selected_category = st.selectbox(
+            "Filtrar por categoria:",
+            options=["Todas"] + list(CATEGORIAS.keys())
+        )
+    with col_size:
+        page_size = st.selectbox(
+            "Itens por página:",
+            options=PAGE_SIZES,
+            index=PAGE_SIZES.index(PAGE_SIZE)
+        )
+
+    # Reinicia a paginação quando a busca, o filtro ou o tamanho da página mudam
+    list_filter = (search, selected_category, page_size)
+    if st.session_state.get('list_filter') != list_filter:
+        st.session_state.list_filter = list_filter
+        st.session_state.page_cursors = [None]
+
+    with span("list.query"):
+        products, next_cursor = get_products_page(
+            category=None if selected_category == "Todas" else selected_category,
+            cursor=st.session_state.page_cursors[-1],
+            page_size=page_size,
+            search=search or None
+        )
 
-    if selected_category != "Todas":
-        products = [p for p in products if p['category'] == selected_category]
+    # Página esvaziada por exclusões: volta para a anterior
+    if not products and len(st.session_state.page_cursors) > 1:
+        st.session_state.page_cursors.pop()
+        st.rerun()
 
-    if not products:
+    if not products and search:
+        st.info("Nenhum produto encontrado para a busca.")
+    elif not products:
         st.info("Nenhum produto cadastrado ainda.")
     else:
-        st.subheader(f"Total de produtos: {len(products)}")
+        st.subheader(f"Página {len(st.session_state.page_cursors)} — {len(products)} produtos")
 
         with st.expander("Ver tabela completa"):
             df = pd.DataFrame(products,
@@ -314,7 +708,7 @@ elif page == "Ver Produtos Cadastrados":
 
                 with col1:
                     if product['image_url']:
-                        st.image(product['image_url'], use_container_width=True)
+                        st.image(product.get('thumbnail_url') or product['image_url'], use_container_width=True)
                     else:
                         st.error("Imagem não encontrada")
 
@@ -329,50 +723,266 @@ elif page == "Ver Produtos Cadastrados":
                         f"Cadastrado em: {datetime.fromisoformat(product['creation_date'].replace('Z', '')).strftime('%d/%m/%Y %H:%M')}")
 
                 with col3:
-                    if product.get('qr_code_url'):
-                        try:
-                            qr_file_path = f"{product['id']}_qrcode.png"
-                            qr_data = supabase.storage.from_(bucket_name).download(qr_file_path)
-
-                            st.download_button(
-                                label="⬇️ QR Code",
-                                data=qr_data,
-                                file_name=f"qr_{product['name']}.png",
-                                mime="image/png",
-                                key=f"qr_{product['id']}"
-                            )
-                        except Exception as e:
-                            st.error(f"Erro ao baixar QR Code: {str(e)}")
-
-                    delete_key = f"del_{product['id']}"
-                    if st.button("🗑️ Excluir", key=delete_key, type="secondary"):
-                        st.session_state['product_to_delete'] = product['id']
-
-                    if 'product_to_delete' in st.session_state and st.session_state['product_to_delete'] == product[
-                        'id']:
-                        st.warning("Tem certeza que deseja excluir este produto permanentemente?")
-                        col_confirm, col_cancel = st.columns(2)
-
-                        with col_confirm:
-                            if st.button("✅ Confirmar Exclusão", key=f"confirm_{product['id']}"):
-                                try:
-                                    supabase.table('products').delete().eq('id', product['id']).execute()
-
-                                    if product['image_url']:
-                                        file_path_image = product['image_url'].split('/')[-1].split('?')[0]
-                                        file_path_qr = f"{product['id']}_qrcode.png"
-                                        supabase.storage.from_(bucket_name).remove([file_path_image, file_path_qr])
-
-                                    st.success("Produto excluído com sucesso!")
-                                    del st.session_state['product_to_delete']
-                                    st.rerun()
-
-                                except Exception as e:
-                                    st.error(f"Erro ao excluir produto: {str(e)}")
-
-                        with col_cancel:
-                            if st.button("❌ Cancelar", key=f"cancel_{product['id']}"):
-                                del st.session_state['product_to_delete']
-                                st.rerun()
-
-                st.divider()
\ No newline at end of file
+                    product_card_controls(product)
+
+                st.divider()
+
+        # Navegação entre páginas
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("⬅️ Anterior", disabled=len(st.session_state.page_cursors) == 1):
+                st.session_state.page_cursors.pop()
+                st.rerun()
+        with col_page:
+            st.caption(f"Página {len(st.session_state.page_cursors)}")
+        with col_next:
+            if st.button("Próxima ➡️", disabled=next_cursor is None):
+                st.session_state.page_cursors.append(next_cursor)
+                st.rerun()
+
+elif page == "Etiquetas":
+    from label_sheets import TEMPLATES, write_pdf, write_svg_zip
+
+    st.title("🏷️ Folhas de Etiquetas")
+    st.write("Gere etiquetas para impressão com QR Code, nome, valor e ID dos produtos.")
+
+    selection = st.radio("Produtos:", ["Por categoria e período", "IDs selecionados"], horizontal=True)
+
+    if selection == "Por categoria e período":
+        label_category = st.selectbox("Categoria:", options=["Todas"] + list(CATEGORIAS.keys()))
+        col_from, col_to = st.columns(2)
+        with col_from:
+            date_from = st.date_input("Cadastrados a partir de:", value=None, format="DD/MM/YYYY")
+        with col_to:
+            date_to = st.date_input("Até:", value=None, format="DD/MM/YYYY")
+    else:
+        ids_text = st.text_area("IDs dos produtos (um por linha ou separados por vírgula):")
+
+    col_template, col_format = st.columns([3, 1])
+    with col_template:
+        template_name = st.selectbox("Modelo da folha:", options=list(TEMPLATES))
+    with col_format:
+        label_format = st.selectbox("Formato:", options=["PDF", "SVG (ZIP)"])
+
+    if st.button("Gerar Etiquetas"):
+        if selection == "Por categoria e período":
+            products = iter_products(
+                category=None if label_category == "Todas" else label_category,
+                date_from=date_from,
+                date_to=date_to
+            )
+        else:
+            try:
+                ids = [int(i) for i in ids_text.replace(",", "\n").split() if i.strip()]
+            except ValueError:
+                st.error("Os IDs devem ser números inteiros.")
+                st.stop()
+            found = get_products(ids)
+            products = [found[i] for i in dict.fromkeys(ids) if i in found]
+
+        # As etiquetas são geradas sob demanda e cada página vai direto para um arquivo temporário;
+        # os bytes só voltam para a memória quando o usuário baixa o arquivo
+        previous = st.session_state.pop('labels_file', None)
+        if previous and os.path.exists(previous['path']):
+            os.remove(previous['path'])
+
+        labels = ({"id": p['id'], "name": p['name'], "price": p.get('price')} for p in products)
+        suffix = ".pdf" if label_format == "PDF" else ".zip"
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as output:
+            try:
+                with st.spinner("Gerando etiquetas..."), span("labels.render", format=label_format):
+                    if label_format == "PDF":
+                        pages = write_pdf(labels, output, TEMPLATES[template_name])
+                    else:
+                        pages = write_svg_zip(labels, output, TEMPLATES[template_name])
+            except Exception as e:
+                pages = None
+                st.error(f"Erro ao gerar etiquetas: {str(e)}")
+
+        if not pages:
+            os.remove(output.name)
+            if pages == 0:
+                st.info("Nenhum produto encontrado para os filtros escolhidos.")
+        else:
+            st.session_state.labels_file = {"path": output.name, "pages": pages, "suffix": suffix}
+
+    labels_file = st.session_state.get('labels_file')
+    if labels_file and os.path.exists(labels_file['path']):
+        st.success(f"{labels_file['pages']} página(s) gerada(s)!")
+        st.download_button(
+            label="⬇️ Baixar Etiquetas",
+            data=Path(labels_file['path']).read_bytes,
+            file_name=f"etiquetas{labels_file['suffix']}",
+            mime="application/pdf" if labels_file['suffix'] == ".pdf" else "application/zip",
+            on_click="ignore"
+        )
+
+elif page == "Exportar Catálogo":
+    from catalog_export import EXPORT_FORMATS
+
+    st.title("📤 Exportar Catálogo")
+    st.write("Exporta os produtos em CSV ou Parquet. O arquivo é gerado em segundo plano, "
+             "página por página, sem carregar o catálogo inteiro.")
+
+    export_columns = st.multiselect("Colunas:", options=EXPORT_COLUMNS, default=EXPORT_COLUMNS[:6])
+    export_category = st.selectbox("Categoria:", options=["Todas"] + list(CATEGORIAS.keys()))
+    col_from, col_to = st.columns(2)
+    with col_from:
+        export_from = st.date_input("Cadastrados a partir de:", value=None, format="DD/MM/YYYY")
+    with col_to:
+        export_to = st.date_input("Até:", value=None, format="DD/MM/YYYY")
+    export_format = st.selectbox("Formato:", options=list(EXPORT_FORMATS))
+
+    export_job = st.session_state.get('export_job')
+    export_running = export_job is not None and not export_job['future'].done()
+    if st.button("📤 Exportar", disabled=export_running or not export_columns):
+        # Só o último arquivo exportado fica no disco
+        if export_job and os.path.exists(export_job['path']):
+            os.remove(export_job['path'])
+
+        suffix, mime = EXPORT_FORMATS[export_format]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as output:
+            pass
+        progress = {"rows": 0}
+        st.session_state.export_job = {
+            "future": get_background_executor().submit(
+                export_catalog, output.name, export_columns, export_format, progress,
+                category=None if export_category == "Todas" else export_category,
+                date_from=export_from,
+                date_to=export_to
+            ),
+            "path": output.name,
+            "suffix": suffix,
+            "mime": mime,
+            "progress": progress
+        }
+        export_running = True
+
+    # Enquanto a exportação não termina, o fragmento se atualiza sozinho (como na limpeza do storage)
+    @st.fragment(run_every=JOB_POLL_SECONDS if export_running else None)
+    def export_status():
+        job = st.session_state.get('export_job')
+        if job is None:
+            return
+        if not job['future'].done():
+            st.info(f"Exportando... {job['progress']['rows']} produtos escritos")
+            return
+        if export_running:
+            st.rerun()
+        try:
+            written = job['future'].result()
+        except Exception as e:
+            st.error(f"Erro na exportação: {str(e)}")
+            return
+        st.success(f"✅ {written} produtos exportados.")
+        st.download_button(
+            label="⬇️ Baixar arquivo",
+            data=Path(job['path']).read_bytes,
+            file_name=f"catalogo{job['suffix']}",
+            mime=job['mime'],
+            on_click="ignore"
+        )
+
+    export_status()
+
+elif page == "Manutenção":
+    from bulk_delete import BulkDeleter
+    from storage_gc import StorageSweeper
+
+    st.title("🧹 Manutenção")
+
+    st.subheader("Exclusão em massa")
+    delete_category = st.selectbox("Categoria:", options=["Todas"] + list(CATEGORIAS.keys()))
+    col_from, col_to = st.columns(2)
+    with col_from:
+        delete_from = st.date_input("Cadastrados a partir de:", value=None, format="DD/MM/YYYY")
+    with col_to:
+        delete_to = st.date_input("Até:", value=None, format="DD/MM/YYYY")
+
+    delete_filters = {
+        "category": None if delete_category == "Todas" else delete_category,
+        "created_from": delete_from.strftime("%Y-%m-%d") if delete_from else None,
+        "created_before": (delete_to + timedelta(days=1)).strftime("%Y-%m-%d") if delete_to else None
+    }
+    deleter = BulkDeleter(supabase, bucket_name, batch_size=BULK_QUERY_CHUNK)
+
+    if not any(delete_filters.values()):
+        st.info("Escolha uma categoria ou um período para excluir.")
+    else:
+        matching = deleter.count(**delete_filters)
+        st.write(f"**{matching}** produto(s) correspondem ao filtro.")
+        confirmed = st.checkbox("Confirmo a exclusão permanente destes produtos, das imagens e dos QR Codes")
+        if st.button("🗑️ Excluir produtos", disabled=not (matching and confirmed)):
+            progress = st.progress(0.0, text="Excluindo produtos...")
+            try:
+                report = deleter.run(
+                    on_progress=lambda done: progress.progress(
+                        min(done / matching, 1.0), text=f"{done}/{matching} produtos excluídos"),
+                    **delete_filters
+                )
+                st.success(f"✅ {len(report['deleted_ids'])} produtos excluídos, "
+                           f"{report['removed_objects']} arquivos removidos do storage.")
+            except Exception as e:
+                report = None
+                st.error(f"Erro na exclusão: {str(e)}. Os arquivos que sobrarem podem ser removidos "
+                         f"pela limpeza do storage abaixo.")
+
+            # Os lotes já excluídos saem dos caches mesmo se um lote posterior falhar
+            if report:
+                for product_id in report['deleted_ids']:
+                    get_product_cache().invalidate(product_id)
+            else:
+                get_product_cache().clear()
+            download_qr_code.clear()
+            fetch_products_page.clear()
+
+    st.divider()
+    st.subheader("Limpeza do storage")
+    st.write("Procura arquivos do bucket que não pertencem a nenhum produto "
+             "(de exclusões interrompidas ou cadastros que falharam).")
+
+    # A varredura roda numa thread; a página só acompanha o resultado
+    col_scan, col_apply = st.columns(2)
+    with col_scan:
+        if st.button("🔍 Simular limpeza"):
+            st.session_state.gc_job = get_background_executor().submit(
+                StorageSweeper(supabase, bucket_name).sweep, dry_run=True)
+    with col_apply:
+        if st.button("🧹 Remover órfãos"):
+            st.session_state.gc_job = get_background_executor().submit(
+                StorageSweeper(supabase, bucket_name).sweep, dry_run=False)
+
+    # Enquanto a varredura não termina, o fragmento se atualiza sozinho; ao terminar, uma
+    # execução completa do app desliga a atualização automática
+    gc_job = st.session_state.get('gc_job')
+    gc_running = gc_job is not None and not gc_job.done()
+
+    @st.fragment(run_every=JOB_POLL_SECONDS if gc_running else None)
+    def gc_status():
+        job = st.session_state.get('gc_job')
+        if job is None:
+            return
+        if not job.done():
+            st.info("Varredura em andamento...")
+            return
+        if gc_running:
+            st.rerun()
+        try:
+            report = job.result()
+        except Exception as e:
+            st.error(f"Erro na varredura: {str(e)}")
+            return
+        verb = "seriam removidos" if report['dry_run'] else "removidos"
+        st.success(f"{report['objects']} arquivos no bucket, {report['referenced']} referenciados; "
+                   f"{len(report['orphans'])} órfãos {verb} "
+                   f"({report['orphan_bytes'] / 1024 / 1024:.1f} MB).")
+        if report['recent_skipped']:
+            st.caption(f"{report['recent_skipped']} arquivo(s) recentes ignorados "
+                       f"(podem ser de cadastros em andamento).")
+        if report['orphans']:
+            with st.expander("Arquivos órfãos"):
+                st.text("\n".join(report['orphans']))
+
+    gc_status()
+
+observe("page.render", time.perf_counter() - run_started, page=page)
@@ -1,34 +1,67 @@
 import streamlit as st
-import qrcode
 import os
-import sqlite3
-import cv2
-import numpy as np
-from pyzbar.pyzbar import decode
-from datetime import datetime
+from datetime import datetime, timedelta
+import time
 import uuid
-from PIL import Image
-import sqlite3
-import pandas as pd
-from contextlib import contextmanager
-import numpy as np
-from PIL import Image
-from io import BytesIO
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from metrics import observe, span, start_exporters_from_env
+from product_cache import ProductCache
+from product_lookup import SQLiteProductLookup
+from product_search import SQLiteProductSearch, ensure_fts
+from sqlite_pool import ConnectionPool
+
+# Dependências pesadas (cv2, pyzbar, pandas, qrcode, PIL) são importadas só pela página que as usa.
+# Depois da primeira importação ficam em sys.modules, então os reruns não pagam o custo de novo.
 
 
 st.set_page_config(page_title="Catálogo de Produtos", page_icon="📦")
 
+# Paginação da listagem de produtos
+PAGE_SIZE = 20
+PAGE_SIZES = [10, 20, 50, 100]
+
+# Quadros analisados por segundo na leitura contínua de vídeo (padrão)
+VIDEO_SCAN_FPS = 8
+
+# Duração máxima (segundos) da leitura de um stream ou câmera
+VIDEO_MAX_SECONDS = 300
+
+# Cache de produtos da leitura de QR Code: quantidade máxima e validade (segundos)
+PRODUCT_CACHE_ENTRIES = 2048
+PRODUCT_CACHE_TTL = 300
+
+# Quantidade máxima de IDs por consulta em lote
+BULK_QUERY_CHUNK = 500
+
+# Quantidade máxima de conexões SQLite abertas
+DB_POOL_SIZE = 4
+
+# Produtos lidos por consulta ao percorrer a tabela inteira (exportação)
+EXPORT_PAGE_SIZE = 500
+
+# Intervalo (segundos) de atualização do andamento da exportação
+JOB_POLL_SECONDS = 2
+
+# Colunas da tabela products, na ordem das tuplas do SQLite (também as colunas da exportação)
+PRODUCT_COLUMNS = ["id", "name", "description", "creation_date", "image_path"]
+
+# Perfil de exportação do QR Code (alta correção de erros para impressão, ver qr_render.QR_PROFILES).
+# O PNG baixado é de 1 bit; a tela amplia a matriz na exibição.
+QR_PROFILE = "print"
+
+
+# Configuração otimizada do banco de dados: pool de conexões mantido entre reruns e sessões
+@st.cache_resource(show_spinner=False)
+def get_db_pool():
+    return ConnectionPool('products.db', size=DB_POOL_SIZE)
 
-# Configuração otimizada do banco de dados
-@contextmanager
 def get_db_connection():
-    conn = sqlite3.connect('products.db', timeout=30)
-    conn.execute("PRAGMA journal_mode=WAL")  # Melhora concorrência
-    try:
-        yield conn
-    finally:
-        conn.close()
+    return get_db_pool().connection()
 
+# Uma vez por processo: nos reruns, o esquema já existe e não há por que abrir escrita no banco
+@st.cache_resource(show_spinner=False)
 def init_db():
     with get_db_connection() as conn:
         conn.execute('''CREATE TABLE IF NOT EXISTS products
@@ -37,6 +70,12 @@ def init_db():
                       description TEXT,
                       creation_date TEXT,
                       image_path TEXT)''')
+        # Índice para a paginação por keyset da listagem
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_products_creation_date_id
+                     ON products (creation_date DESC, id DESC)''')
+        conn.commit()
+        # Índice de busca textual, mantido por triggers (criado só se ainda não existir)
+        ensure_fts(conn)
 
 def insert_product(product_id, name, description, creation_date, image_path):
     with get_db_connection() as conn:
@@ -45,14 +84,153 @@ def insert_product(product_id, name, description, creation_date, image_path):
         conn.commit()  # Commit explícito
 
 def get_product(product_id):
+    return get_product_lookup().get(product_id)
+
+# Busca vários produtos de uma vez, em vez de uma consulta por ID; só vai ao banco o que não está em cache
+def get_products(product_ids):
+    return get_product_lookup().get_many(product_ids)
+
+# Paginação por keyset em (creation_date, id): cada página continua a partir do último item da anterior.
+# Com busca, o resultado vem do índice FTS5 ordenado por relevância e o cursor é a posição no ranking.
+def get_products_page(cursor=None, page_size=PAGE_SIZE, search=None):
+    if search:
+        return get_product_search().page(search, cursor or 0, page_size)
     with get_db_connection() as conn:
-        cursor = conn.execute("SELECT * FROM products WHERE id=?", (product_id,))
-        return cursor.fetchone()
-# Adicione esta nova função no banco de dados
-def get_all_products():
-    with get_db_connection() as conn:
-        cursor = conn.execute("SELECT * FROM products ORDER BY creation_date DESC")
-        return cursor.fetchall()
+        if cursor:
+            rows = conn.execute("""SELECT * FROM products
+                                   WHERE (creation_date, id) < (?, ?)
+                                   ORDER BY creation_date DESC, id DESC
+                                   LIMIT ?""", (*cursor, page_size + 1)).fetchall()
+        else:
+            rows = conn.execute("""SELECT * FROM products
+                                   ORDER BY creation_date DESC, id DESC
+                                   LIMIT ?""", (page_size + 1,)).fetchall()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1][3], rows[-1][0])
+    return rows, next_cursor
+
+# Percorre todos os produtos do período em páginas de keyset, como dicionários (date_to inclusive)
+def iter_products(date_from=None, date_to=None, page_size=EXPORT_PAGE_SIZE):
+    conditions, params = [], []
+    if date_from:
+        conditions.append("creation_date >= ?")
+        params.append(date_from.strftime("%Y-%m-%d"))
+    if date_to:
+        conditions.append("creation_date < ?")
+        params.append((date_to + timedelta(days=1)).strftime("%Y-%m-%d"))
+    cursor = None
+    while True:
+        where = conditions + (["(creation_date, id) < (?, ?)"] if cursor else [])
+        sql = "SELECT * FROM products" + (f" WHERE {' AND '.join(where)}" if where else "")
+        # Uma conexão por página: a exportação não segura uma conexão do pool o tempo todo
+        with get_db_connection() as conn:
+            rows = conn.execute(sql + " ORDER BY creation_date DESC, id DESC LIMIT ?",
+                                (*params, *(cursor or ()), page_size)).fetchall()
+        for row in rows:
+            yield dict(zip(PRODUCT_COLUMNS, row))
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1][3], rows[-1][0])
+
+# Decodificador criado uma única vez por processo e reaproveitado entre reruns e sessões
+@st.cache_resource(show_spinner=False)
+def get_qr_decoder():
+    from qr_decoder import QRDecoder
+    return QRDecoder()
+
+# Cache de produtos compartilhado por todas as sessões (leituras repetidas não vão ao banco)
+@st.cache_resource(show_spinner=False)
+def get_product_cache():
+    return ProductCache(max_entries=PRODUCT_CACHE_ENTRIES, ttl=PRODUCT_CACHE_TTL)
+
+# Busca de produtos com cache, a mesma usada pelo serviço HTTP (scan_service.py)
+@st.cache_resource(show_spinner=False)
+def get_product_lookup():
+    return SQLiteProductLookup(get_db_pool(), get_product_cache(), chunk_size=BULK_QUERY_CHUNK)
+
+# Busca textual da listagem sobre o índice FTS5
+@st.cache_resource(show_spinner=False)
+def get_product_search():
+    return SQLiteProductSearch(get_db_pool())
+
+# Pool de processos para leitura em lote, mantido entre reruns
+@st.cache_resource(show_spinner=False)
+def get_batch_scanner():
+    from batch_scan import BatchScanner
+    return BatchScanner()
+
+# Pool de threads para normalizar e gravar as imagens fora da thread do script
+@st.cache_resource(show_spinner=False)
+def get_image_executor():
+    return ThreadPoolExecutor(max_workers=2)
+
+# Thread da exportação do catálogo, que roda fora da renderização da página
+@st.cache_resource(show_spinner=False)
+def get_background_executor():
+    return ThreadPoolExecutor(max_workers=1)
+
+# Exportação do catálogo (roda na thread de segundo plano): as páginas do filtro vão direto
+# para o arquivo. progress["rows"] acompanha o andamento.
+def export_catalog(path, columns, export_format, progress, **filters):
+    from catalog_export import write_export
+    with open(path, "wb") as out:
+        return write_export(iter_products(**filters), out, columns, export_format,
+                            on_progress=lambda written: progress.update(rows=written))
+
+# Normaliza a imagem enviada (orientação, tamanho, metadados) e grava a original e as variantes.
+# Devolve os tamanhos do arquivo recebido e do gravado.
+def save_product_image(product_id, image_bytes, image_path):
+    from image_variants import make_variants, normalize_image, variant_name
+
+    normalized = normalize_image(image_bytes)
+    with open(image_path, "wb") as f:
+        f.write(normalized)
+
+    # Miniatura e imagem média gravadas ao lado da original
+    for variant, data in make_variants(normalized).items():
+        with open(os.path.join('product_images', variant_name(product_id, variant)), "wb") as f:
+            f.write(data)
+    return len(image_bytes), len(normalized)
+
+# Caminho da variante reduzida da imagem; produtos antigos, sem variantes, usam a original
+def image_variant_path(product_id, image_path, variant):
+    from image_variants import variant_name
+    path = os.path.join('product_images', variant_name(product_id, variant))
+    return path if os.path.exists(path) else image_path
+
+# Controles de cada card da listagem num fragmento: "Ver QR Code" e "Excluir" reexecutam só
+# este card, sem buscar e redesenhar o catálogo inteiro. Só a exclusão reexecuta o app,
+# porque a página muda de composição.
+@st.fragment
+def product_card_controls(product):
+    from qr_render import render_profile_array
+    from image_variants import VARIANTS, variant_name
+
+    # Botão para ver QR Code
+    if st.button("Ver QR Code", key=f"qr_{product[0]}"):
+        st.image(render_profile_array(product[0], QR_PROFILE),
+                 caption=f"QR Code - {product[1]}",
+                 use_container_width=True)
+
+    # Botão para excluir
+    if st.button("Excluir", key=f"del_{product[0]}", type="primary"):
+        # Confirmar exclusão
+        if st.warning("Tem certeza que deseja excluir este produto?"):
+            # Deletar imagem e variantes
+            for path in [product[4]] + [os.path.join('product_images', variant_name(product[0], variant))
+                                        for variant in VARIANTS]:
+                if os.path.exists(path):
+                    os.remove(path)
+            # Deletar do banco de dados
+            with get_db_connection() as conn:
+                conn.execute("DELETE FROM products WHERE id=?", (product[0],))
+                conn.commit()
+            get_product_cache().invalidate(product[0])
+            st.success("Produto excluído com sucesso!")
+            st.rerun()
 
 # Diretórios
 os.makedirs('product_images', exist_ok=True)
@@ -60,14 +238,23 @@ init_db()
 
 # Interface principal
 st.sidebar.title("Navegação")
-page = st.sidebar.radio("Selecione a página:", ["Gerar QR Code", "Ler QR Code", "Ver Produtos Cadastrados"])
+page = st.sidebar.radio("Selecione a página:", ["Gerar QR Code", "Ler QR Code", "Ver Produtos Cadastrados",
+                                                "Exportar Catálogo"])
+
+# Exportação das métricas (Prometheus/JSON lines) e tempo total desta execução
+start_exporters_from_env()
+run_started = time.perf_counter()
 
 if page == "Gerar QR Code":
+    from qr_render import render_profile_array, render_profile_png, render_profile_svg
+    from image_variants import VARIANTS, normalized_format, variant_name
+
     st.title("📷 Gerador de QR Code para Produtos")
 
     if 'generated' not in st.session_state:
         st.session_state.generated = False
         st.session_state.qr_bytes = None
+        st.session_state.product_id = None
         st.session_state.product_name = ""
         st.session_state.image_path = ""
 
@@ -85,42 +272,52 @@ if page == "Gerar QR Code":
             else:
                 product_id = str(uuid.uuid4())
                 creation_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                st.session_state.image_path = f"product_images/{product_id}.{image_file.name.split('.')[-1]}"
-
-                with open(st.session_state.image_path, "wb") as f:
-                    f.write(image_file.getbuffer())
-
-                insert_product(product_id, name, description, creation_date, st.session_state.image_path)
-
-                # Geração do QR Code melhorada
-                qr = qrcode.QRCode(
-                    version=1,
-                    error_correction=qrcode.constants.ERROR_CORRECT_H,
-                    box_size=20,
-                    border=6,
-                )
-                qr.add_data(product_id)
-                qr.make(fit=True)
-                qr_img = qr.make_image(fill_color="black", back_color="white")
-
-                img_buffer = BytesIO()
-                qr_img.save(img_buffer, format="PNG")
-                st.session_state.qr_bytes = img_buffer.getvalue()
-                st.session_state.product_name = name
-                st.session_state.generated = True
+                image_bytes = image_file.getvalue()
+                image_path = None
+                try:
+                    image_path = f"product_images/{product_id}.{normalized_format(image_bytes)[0]}"
+
+                    # A imagem é normalizada e gravada no pool enquanto o QR Code é gerado; a linha só é
+                    # inserida depois que a imagem foi gravada, para nunca apontar para um arquivo inexistente
+                    saving = get_image_executor().submit(save_product_image, product_id, image_bytes, image_path)
+                    qr_bytes = render_profile_png(product_id, QR_PROFILE)
+                    qr_svg = render_profile_svg(product_id, QR_PROFILE)
+                    image_sizes = saving.result()
+                except Exception as e:
+                    st.error(f"Erro ao processar a imagem: {str(e)}")
+                    st.session_state.generated = False
+                    # Remove o que a gravação tenha deixado pela metade
+                    if image_path:
+                        for path in [image_path] + [os.path.join('product_images', variant_name(product_id, variant))
+                                                    for variant in VARIANTS]:
+                            if os.path.exists(path):
+                                os.remove(path)
+                else:
+                    insert_product(product_id, name, description, creation_date, image_path)
+                    get_product_cache().invalidate(product_id)
+
+                    st.session_state.image_path = image_path
+                    st.session_state.qr_bytes = qr_bytes
+                    st.session_state.qr_svg = qr_svg
+                    st.session_state.product_id = product_id
+                    st.session_state.product_name = name
+                    st.session_state.image_sizes = image_sizes
+                    st.session_state.generated = True
 
     if st.session_state.generated:
         st.success("✅ QR Code gerado com sucesso!")
+        original_bytes, stored_bytes = st.session_state.image_sizes
+        st.caption(f"Imagem otimizada: {original_bytes / 1024:.0f} KB → {stored_bytes / 1024:.0f} KB")
         col1, col2 = st.columns(2)
         with col1:
-            qr_array = np.array(Image.open(BytesIO(st.session_state.qr_bytes)))
-            st.image(qr_array,
+            st.image(render_profile_array(st.session_state.product_id, QR_PROFILE),
                      caption="QR Code do Produto",
                      use_container_width=True,
                      channels="RGB")
         with col2:
             if os.path.exists(st.session_state.image_path):
-                st.image(st.session_state.image_path, caption="Imagem do Produto", width=300)
+                st.image(image_variant_path(st.session_state.product_id, st.session_state.image_path, "medium"),
+                         caption="Imagem do Produto", width=300)
             else:
                 st.error("Imagem não encontrada")
 
@@ -130,68 +327,152 @@ if page == "Gerar QR Code":
             file_name=f"qr_code_{st.session_state.product_name}.png",
             mime="image/png"
         )
+        st.download_button(
+            label="Baixar QR Code (SVG)",
+            data=st.session_state.qr_svg,
+            file_name=f"qr_code_{st.session_state.product_name}.svg",
+            mime="image/svg+xml"
+        )
 
 # Atualize a seção de leitura do QR Code
 elif page == "Ler QR Code":
+    from qr_decoder import load_grayscale
+    from qr_render import render_profile_array
+
     st.title("🔍 Leitor de QR Code")
 
-    scan_method = st.radio("Escolha o método de leitura:", ["Usar Câmera", "Upload de Imagem"])
+    scan_method = st.radio("Escolha o método de leitura:", ["Usar Câmera", "Upload de Imagem", "Lote de Imagens",
+                                                            "Vídeo Contínuo"])
     detected_data = None
 
-
-    def decode_qr(image):
-        try:
-            # Converter para array numpy uint8
-            if image.dtype == bool:
-                image = image.astype(np.uint8) * 255
-
-            # Converter para escala de cinza se necessário
-            if len(image.shape) == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-
-            # Primeiro tentar com pyzbar
-            decoded_objects = decode(image)
-            if decoded_objects:
-                return decoded_objects[0].data.decode('utf-8')
-
-            # Se falhar, tentar com OpenCV
-            detector = cv2.QRCodeDetector()
-            data, _, _ = detector.detectAndDecode(image)
-            return data if data else None
-
-        except Exception as e:
-            st.error(f"Erro no processamento: {str(e)}")
-            return None
-
-
     if scan_method == "Usar Câmera":
         camera_image = st.camera_input("Aponte a câmera para o QR Code")
         if camera_image:
             try:
                 # Carregar imagem diretamente em escala de cinza
-                image = np.array(Image.open(camera_image).convert('L'))
-                detected_data = decode_qr(image)
+                image = load_grayscale(camera_image)
+                detected_data = get_qr_decoder().decode_first(image)
 
             except Exception as e:
                 st.error(f"Erro na leitura: {str(e)}")
 
-    else:
+    elif scan_method == "Upload de Imagem":
         uploaded_file = st.file_uploader("Carregue uma imagem com QR Code", type=['jpg', 'jpeg', 'png'])
         if uploaded_file:
             try:
                 # Carregar imagem em escala de cinza
-                image = np.array(Image.open(uploaded_file).convert('L'))
-                detected_data = decode_qr(image)
+                image = load_grayscale(uploaded_file)
+                detected_data = get_qr_decoder().decode_first(image)
 
             except Exception as e:
                 st.error(f"Erro na leitura: {str(e)}")
 
+    elif scan_method == "Vídeo Contínuo":
+        import pandas as pd
+        from video_scan import VideoScanner, iter_frames
+
+        # Leitura contínua: cada produto que aparece no vídeo é reportado uma vez, sem clicar a cada leitura
+        video_file = st.file_uploader("Carregue um vídeo gravado", type=['mp4', 'avi', 'mov', 'mkv', 'mjpeg'])
+        stream_url = st.text_input("Ou informe a URL do stream (MJPEG/RTSP) ou o número da câmera")
+        max_fps = st.slider("Quadros analisados por segundo", 1, 15, VIDEO_SCAN_FPS)
+        if (video_file or stream_url.strip()) and st.button("▶️ Iniciar leitura"):
+            source = stream_url.strip()
+            temp_path = None
+            if video_file:
+                # O OpenCV só abre vídeos a partir de um caminho
+                with tempfile.NamedTemporaryFile(suffix=os.path.splitext(video_file.name)[1], delete=False) as temp:
+                    temp.write(video_file.getvalue())
+                source = temp_path = temp.name
+
+            status = st.empty()
+            table = st.empty()
+            rows = []
+            scanner = VideoScanner(decoder=get_qr_decoder())
+            # Streams e câmeras não terminam sozinhos: a leitura dura no máximo VIDEO_MAX_SECONDS, e o
+            # status é atualizado a cada poucos quadros mesmo sem leituras, porque o Streamlit só
+            # interrompe o script (rerun, troca de página) numa chamada st.*
+            frames = iter_frames(source, max_fps=max_fps, max_seconds=None if video_file else VIDEO_MAX_SECONDS)
+            try:
+                for detection in scanner.scan(frames, on_progress=lambda stats: status.caption(
+                        f"{stats['frames']} quadros analisados, {stats['duplicates']} repetidos ignorados")):
+                    code = detection['code'].strip()
+                    product = get_product(code)
+                    rows.append({
+                        "Tempo (s)": round(detection['timestamp'], 1),
+                        "ID": code,
+                        "Produto": product[1] if product else "Não encontrado"
+                    })
+                    table.dataframe(pd.DataFrame(rows), use_container_width=True)
+                    status.caption(f"{scanner.stats['frames']} quadros analisados, "
+                                   f"{scanner.stats['duplicates']} repetidos ignorados")
+            except Exception as e:
+                st.error(f"Erro na leitura do vídeo: {str(e)}")
+            finally:
+                # Libera a captura também quando o script é interrompido
+                frames.close()
+                if temp_path:
+                    os.remove(temp_path)
+
+            st.success(f"✅ {len(rows)} leituras em {scanner.stats['frames']} quadros analisados "
+                       f"({scanner.stats['duplicates']} repetidos ignorados)")
+    else:
+        import pandas as pd
+        from batch_scan import iter_images
+
+        batch_files = st.file_uploader(
+            "Carregue várias imagens ou arquivos ZIP",
+            type=['jpg', 'jpeg', 'png', 'zip'],
+            accept_multiple_files=True
+        )
+        if batch_files and st.button("🔍 Processar lote"):
+            status = st.empty()
+            table = st.empty()
+            scanned = []
+            last_refresh = 0.0
+
+            # Resultados exibidos à medida que cada imagem termina
+            for result in get_batch_scanner().scan(iter_images(batch_files)):
+                scanned.append(result)
+                status.caption(f"{result['processed']} imagens processadas — "
+                               f"{result['throughput']:.1f} imagens/s")
+                if time.monotonic() - last_refresh >= 0.5:
+                    last_refresh = time.monotonic()
+                    table.dataframe(pd.DataFrame([{
+                        "Arquivo": r['name'],
+                        "QR Codes": ", ".join(r['results']) or "—",
+                        "Erro": r['error'] or ""
+                    } for r in scanned]), use_container_width=True)
+
+            # Uma única consulta para todos os IDs detectados
+            products = get_products({code.strip() for r in scanned for code in r['results']})
+
+            rows = []
+            found = 0
+            for r in scanned:
+                for code in r['results'] or [None]:
+                    product = products.get(code.strip()) if code else None
+                    found += product is not None
+                    rows.append({
+                        "Arquivo": r['name'],
+                        "ID": code or "—",
+                        "Produto": product[1] if product else
+                        ("Não encontrado" if code else r['error'] or "Nenhum QR Code detectado")
+                    })
+
+            table.dataframe(pd.DataFrame(rows), use_container_width=True)
+            if scanned:
+                st.success(f"✅ {len(scanned)} imagens processadas, {found} produtos encontrados "
+                           f"({scanned[-1]['throughput']:.1f} imagens/s)")
+            else:
+                st.info("Nenhuma imagem encontrada nos arquivos enviados.")
+
     if detected_data:
         st.success("✅ QR Code detectado com sucesso!")
 
         try:
             product_id = detected_data.strip()
-            product = get_product(product_id)
+            with span("scan.lookup"):
+                product = get_product(product_id)
 
             if product:
                 st.subheader("📋 Detalhes do Produto")
@@ -202,15 +483,14 @@ elif page == "Ler QR Code":
                 with col1:
                     # Exibir imagem do produto
                     if os.path.exists(product[4]):
-                        st.image(product[4],
+                        st.image(image_variant_path(product[0], product[4], "medium"),
                                  caption="Foto do Produto",
                                  use_container_width=True)
                     else:
                         st.error("Imagem não encontrada")
 
                     # Exibir QR Code novamente
-                    qr_img = qrcode.make(product_id)
-                    st.image(np.array(qr_img.convert("RGB")),
+                    st.image(render_profile_array(product_id, QR_PROFILE),
                              caption="QR Code do Produto",
                              use_container_width=True)
 
@@ -244,15 +524,43 @@ elif page == "Ler QR Code":
             st.write("Detalhes técnicos:", detected_data)
 
 elif page == "Ver Produtos Cadastrados":
+    import pandas as pd
+
     st.title("📦 Produtos Cadastrados")
 
-# Buscar todos os produtos
-    products = get_all_products()
+    search = st.text_input("🔍 Buscar por nome ou descrição:").strip()
+
+    page_size = st.selectbox(
+        "Itens por página:",
+        options=PAGE_SIZES,
+        index=PAGE_SIZES.index(PAGE_SIZE)
+    )
+
+    # Reinicia a paginação quando a busca ou o tamanho da página mudam
+    list_filter = (search, page_size)
+    if st.session_state.get('list_filter') != list_filter:
+        st.session_state.list_filter = list_filter
+        st.session_state.page_cursors = [None]
+
+    # Buscar apenas a página atual
+    with span("list.query"):
+        products, next_cursor = get_products_page(
+            cursor=st.session_state.page_cursors[-1],
+            page_size=page_size,
+            search=search or None
+        )
+
+    # Página esvaziada por exclusões: volta para a anterior
+    if not products and len(st.session_state.page_cursors) > 1:
+        st.session_state.page_cursors.pop()
+        st.rerun()
 
-    if not products:
+    if not products and search:
+        st.info("Nenhum produto encontrado para a busca.")
+    elif not products:
         st.info("Nenhum produto cadastrado ainda.")
     else:
-        st.subheader(f"Total de produtos: {len(products)}")
+        st.subheader(f"Página {len(st.session_state.page_cursors)} — {len(products)} produtos")
 
     # Exibir em formato de tabela
     with st.expander("Ver tabela completa"):
@@ -265,7 +573,7 @@ elif page == "Ver Produtos Cadastrados":
             col1, col2, col3 = st.columns([1, 3, 1])
             with col1:
                 if os.path.exists(product[4]):
-                    st.image(product[4], use_container_width=True)
+                    st.image(image_variant_path(product[0], product[4], "thumbnail"), use_container_width=True)
                 else:
                     st.error("Imagem não encontrada")
 
@@ -275,33 +583,94 @@ elif page == "Ver Produtos Cadastrados":
                 st.caption(f"Cadastrado em: {product[3]}")
 
             with col3:
-                # Botão para ver QR Code
-                if st.button("Ver QR Code", key=f"qr_{product[0]}"):
-                    qr = qrcode.make(product[0])
-                    st.image(np.array(qr.convert("RGB")),
-                             caption=f"QR Code - {product[1]}",
-                             use_container_width=True)
-
-                # Botão para excluir (opcional)
-                # Dentro da página "Ver Produtos Cadastrados"
-                if st.button("Excluir", key=f"del_{product[0]}", type="primary"):
-                    # Confirmar exclusão
-                    if st.warning("Tem certeza que deseja excluir este produto?"):
-                        # Deletar imagem
-                        if os.path.exists(product[4]):
-                            os.remove(product[4])
-                        # Deletar do banco de dados
-                        with get_db_connection() as conn:
-                            conn.execute("DELETE FROM products WHERE id=?", (product[0],))
-                            conn.commit()
-                        st.success("Produto excluído com sucesso!")
-                        st.rerun()  # <-- Linha corrigida
+                product_card_controls(product)
 
             st.divider()
 
+    # Navegação entre páginas
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("⬅️ Anterior", disabled=len(st.session_state.page_cursors) == 1):
+            st.session_state.page_cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Página {len(st.session_state.page_cursors)}")
+    with col_next:
+        if st.button("Próxima ➡️", disabled=next_cursor is None):
+            st.session_state.page_cursors.append(next_cursor)
+            st.rerun()
+
+elif page == "Exportar Catálogo":
+    from catalog_export import EXPORT_FORMATS
+
+    st.title("📤 Exportar Catálogo")
+    st.write("Exporta os produtos em CSV ou Parquet. O arquivo é gerado em segundo plano, "
+             "página por página, sem carregar o catálogo inteiro.")
+
+    export_columns = st.multiselect("Colunas:", options=PRODUCT_COLUMNS, default=PRODUCT_COLUMNS[:4])
+    col_from, col_to = st.columns(2)
+    with col_from:
+        export_from = st.date_input("Cadastrados a partir de:", value=None, format="DD/MM/YYYY")
+    with col_to:
+        export_to = st.date_input("Até:", value=None, format="DD/MM/YYYY")
+    export_format = st.selectbox("Formato:", options=list(EXPORT_FORMATS))
+
+    export_job = st.session_state.get('export_job')
+    export_running = export_job is not None and not export_job['future'].done()
+    if st.button("📤 Exportar", disabled=export_running or not export_columns):
+        # Só o último arquivo exportado fica no disco
+        if export_job and os.path.exists(export_job['path']):
+            os.remove(export_job['path'])
+
+        suffix, mime = EXPORT_FORMATS[export_format]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as output:
+            pass
+        progress = {"rows": 0}
+        st.session_state.export_job = {
+            "future": get_background_executor().submit(
+                export_catalog, output.name, export_columns, export_format, progress,
+                date_from=export_from,
+                date_to=export_to
+            ),
+            "path": output.name,
+            "suffix": suffix,
+            "mime": mime,
+            "progress": progress
+        }
+        export_running = True
+
+    # Enquanto a exportação não termina, o fragmento se atualiza sozinho (como na limpeza do storage)
+    @st.fragment(run_every=JOB_POLL_SECONDS if export_running else None)
+    def export_status():
+        job = st.session_state.get('export_job')
+        if job is None:
+            return
+        if not job['future'].done():
+            st.info(f"Exportando... {job['progress']['rows']} produtos escritos")
+            return
+        if export_running:
+            st.rerun()
+        try:
+            written = job['future'].result()
+        except Exception as e:
+            st.error(f"Erro na exportação: {str(e)}")
+            return
+        st.success(f"✅ {written} produtos exportados.")
+        st.download_button(
+            label="⬇️ Baixar arquivo",
+            data=Path(job['path']).read_bytes,
+            file_name=f"catalogo{job['suffix']}",
+            mime=job['mime'],
+            on_click="ignore"
+        )
+
+    export_status()
+
 # Rodar o app
 if __name__ == '__main__':
     st.write("Para acesso mobile:")
     st.write("1. Execute no terminal: `streamlit run app_init.py --server.address 0.0.0.0`")
     st.write("2. Use o ngrok para HTTPS: `ngrok http 8501`")
-    st.write("3. Acesse o link HTTPS fornecido pelo ngrok")
\ No newline at end of file
+    st.write("3. Acesse o link HTTPS fornecido pelo ngrok")
+
+observe("page.render", time.perf_counter() - run_started, page=page)
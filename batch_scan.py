@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from io import BytesIO
+
+from qr_decoder import get_decoder, load_grayscale
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+# Expande os arquivos enviados (imagens soltas ou ZIPs) em pares (nome, bytes), sob demanda
+def iter_images(files):
+    for image_file in files:
+        name = image_file.name
+        if name.lower().endswith('.zip'):
+            with zipfile.ZipFile(image_file) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        yield info.filename, archive.read(info)
+        elif name.lower().endswith(IMAGE_EXTENSIONS):
+            yield name, image_file.getvalue()
+
+
+# Executado nos processos do pool: cada processo mantém o seu próprio decodificador aquecido
+def _decode_item(item):
+    name, data = item
+    try:
+        results = get_decoder().decode(load_grayscale(BytesIO(data)))
+        return {"name": name, "results": results, "error": None}
+    except Exception as e:
+        return {"name": name, "results": [], "error": str(e)}
+
+
+# Decodificação em lote distribuída entre os núcleos da CPU.
+# O pool é criado uma vez e reaproveitado entre lotes.
+class BatchScanner:
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Limita as imagens em trânsito para manter a memória estável em lotes grandes
+        self.max_pending = max_pending or self.max_workers * 4
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    # Gera um resultado por imagem, na ordem em que terminam
+    def scan(self, items):
+        started = time.perf_counter()
+        processed = 0
+        pending = set()
+
+        def collect(done):
+            nonlocal processed
+            for future in done:
+                processed += 1
+                result = future.result()
+                result["processed"] = processed
+                result["throughput"] = processed / max(time.perf_counter() - started, 1e-9)
+                yield result
+
+        for item in items:
+            pending.add(self._executor.submit(_decode_item, item))
+            if len(pending) >= self.max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from collect(done)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
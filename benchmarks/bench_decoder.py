@@ -0,0 +1,260 @@
+# Benchmark do decodificador de QR Code.
+#
+# Gera um corpus reprodutível (IDs numéricos do app.py e UUIDs do app_supabase.py),
+# aplica degradações (resolução, JPEG, desfoque, rotação, perspectiva, ruído) e mede
+# latência por imagem e taxa de sucesso de: pyzbar sozinho, OpenCV sozinho e o fallback combinado.
+#
+# Uso (a partir da raiz do repositório):
+#   python -m benchmarks.bench_decoder
+#   python -m benchmarks.bench_decoder --payloads 50 --output benchmarks/results/antes.json
+#   python -m benchmarks.bench_decoder --compare benchmarks/results/antes.json
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+import cv2
+import numpy as np
+from pyzbar.pyzbar import decode as pyzbar_decode, ZBarSymbol
+
+from qr_decoder import QRDecoder
+from qr_render import render_array
+
+
+# Tamanhos de "foto" em que o QR Code é inserido (largura, altura)
+CANVAS_SIZES = [(640, 480), (1280, 960), (1920, 1080)]
+
+
+def _jpeg(image, quality):
+    _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return cv2.imdecode(encoded, cv2.IMREAD_GRAYSCALE)
+
+
+def _rotate(image, angle):
+    h, w = image.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (w, h), borderValue=255)
+
+
+def _perspective(image, rng):
+    h, w = image.shape
+    d = 0.12
+    src = np.float32([[0, 0], [w, 0], [w, h], [0, h]])
+    dst = np.float32([[rng.uniform(0, d) * w, rng.uniform(0, d) * h],
+                      [w - rng.uniform(0, d) * w, rng.uniform(0, d) * h],
+                      [w - rng.uniform(0, d) * w, h - rng.uniform(0, d) * h],
+                      [rng.uniform(0, d) * w, h - rng.uniform(0, d) * h]])
+    return cv2.warpPerspective(image, cv2.getPerspectiveTransform(src, dst), (w, h), borderValue=255)
+
+
+def _noise(image, sigma, rng):
+    noise = np.random.default_rng(rng.randrange(2 ** 32)).normal(0, sigma, image.shape)
+    return np.clip(image.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+
+def _scale(image, factor):
+    h, w = image.shape
+    return cv2.resize(image, (max(1, int(w * factor)), max(1, int(h * factor))), interpolation=cv2.INTER_AREA)
+
+
+# Nome -> função(imagem, rng)
+DEGRADATIONS = {
+    "original": lambda img, rng: img,
+    "scale_0.5": lambda img, rng: _scale(img, 0.5),
+    "scale_0.25": lambda img, rng: _scale(img, 0.25),
+    "jpeg_q30": lambda img, rng: _jpeg(img, 30),
+    "jpeg_q10": lambda img, rng: _jpeg(img, 10),
+    "blur_3": lambda img, rng: cv2.GaussianBlur(img, (3, 3), 0),
+    "blur_7": lambda img, rng: cv2.GaussianBlur(img, (7, 7), 0),
+    "rotate_15": lambda img, rng: _rotate(img, 15),
+    "rotate_45": lambda img, rng: _rotate(img, 45),
+    "perspective": lambda img, rng: _perspective(img, rng),
+    "noise_25": lambda img, rng: _noise(img, 25, rng),
+}
+
+
+def _payloads(count, rng):
+    numeric = [str(100001 + rng.randrange(350000)) for _ in range(count - count // 2)]
+    uuids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(count // 2)]
+    return [("numeric", p) for p in numeric] + [("uuid", p) for p in uuids]
+
+
+def _place(code, canvas_size, rng):
+    width, height = canvas_size
+    canvas = np.full((height, width), 255, dtype=np.uint8)
+    # O QR Code ocupa entre 25% e 60% do menor lado da foto
+    side = int(min(width, height) * rng.uniform(0.25, 0.6))
+    code = cv2.resize(code, (side, side), interpolation=cv2.INTER_NEAREST)
+    x = rng.randrange(width - side + 1)
+    y = rng.randrange(height - side + 1)
+    canvas[y:y + side, x:x + side] = code
+    return canvas
+
+
+# Gera as imagens uma a uma (cada uma é descartada depois de medida), sem montar o corpus na memória
+def iter_corpus(payload_count, seed, canvas_sizes=CANVAS_SIZES, degradations=DEGRADATIONS):
+    rng = random.Random(seed)
+    for kind, payload in _payloads(payload_count, rng):
+        code = cv2.cvtColor(np.asarray(render_array(payload)), cv2.COLOR_RGB2GRAY)
+        for canvas_size in canvas_sizes:
+            base = _place(code, canvas_size, rng)
+            for name, degrade in degradations.items():
+                yield {
+                    "payload": payload,
+                    "kind": kind,
+                    "canvas": f"{canvas_size[0]}x{canvas_size[1]}",
+                    "degradation": name,
+                    "image": degrade(base, rng),
+                }
+
+
+def _decode_opencv_factory():
+    detector = cv2.QRCodeDetector()
+
+    def decode(image):
+        data, _, _ = detector.detectAndDecode(image)
+        return [data] if data else []
+    return decode
+
+
+def _decode_pyzbar(image):
+    return [obj.data.decode("utf-8") for obj in pyzbar_decode(image, symbols=[ZBarSymbol.QRCODE])]
+
+
+def decoder_methods():
+    return {
+        "pyzbar": _decode_pyzbar,
+        "opencv": _decode_opencv_factory(),
+        "combined": QRDecoder().decode,
+    }
+
+
+def _summary(samples):
+    latencies = sorted(s["ms"] for s in samples)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))]
+
+    return {
+        "count": len(samples),
+        "success_rate": sum(s["ok"] for s in samples) / len(samples),
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": latencies[-1],
+    }
+
+
+def _group(samples, key):
+    groups = {}
+    for sample in samples:
+        groups.setdefault(sample[key], []).append(sample)
+    return {name: _summary(group) for name, group in sorted(groups.items())}
+
+
+# Cada imagem passa por todos os métodos assim que é gerada; as primeiras warmup imagens
+# são decodificadas uma vez antes da medição, para aquecer cada método
+def run(corpus, methods, warmup=3):
+    samples = {name: [] for name in methods}
+    for index, item in enumerate(corpus):
+        for name, decode in methods.items():
+            if index < warmup:
+                decode(item["image"])
+            started = time.perf_counter()
+            try:
+                decoded = decode(item["image"])
+            except Exception:
+                decoded = []
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            samples[name].append({
+                "ms": elapsed_ms,
+                "ok": item["payload"] in decoded,
+                "kind": item["kind"],
+                "canvas": item["canvas"],
+                "degradation": item["degradation"],
+            })
+
+    return {
+        name: {
+            "overall": _summary(method_samples),
+            "by_degradation": _group(method_samples, "degradation"),
+            "by_canvas": _group(method_samples, "canvas"),
+            "by_kind": _group(method_samples, "kind"),
+        }
+        for name, method_samples in samples.items()
+    }
+
+
+def _print_report(report, baseline=None):
+    print(f"{'método':<10} {'sucesso':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for name, result in report["results"].items():
+        overall = result["overall"]
+        line = (f"{name:<10} {overall['success_rate']:>8.1%} {overall['p50_ms']:>8.2f} "
+                f"{overall['p90_ms']:>8.2f} {overall['p99_ms']:>8.2f}")
+        if baseline and name in baseline["results"]:
+            old = baseline["results"][name]["overall"]
+            line += (f"   Δ sucesso {overall['success_rate'] - old['success_rate']:+.1%}"
+                     f"  Δ p50 {overall['p50_ms'] - old['p50_ms']:+.2f} ms")
+        print(line)
+
+    print()
+    print(f"{'degradação':<14}" + "".join(f"{name:>12}" for name in report["results"]))
+    for degradation in DEGRADATIONS:
+        row = f"{degradation:<14}"
+        for result in report["results"].values():
+            group = result["by_degradation"].get(degradation)
+            row += f"{group['success_rate']:>12.1%}" if group else f"{'—':>12}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do decodificador de QR Code")
+    parser.add_argument("--payloads", type=int, default=20, help="quantidade de payloads (metade IDs, metade UUIDs)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--methods", nargs="+", choices=["pyzbar", "opencv", "combined"],
+                        default=["pyzbar", "opencv", "combined"])
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: benchmarks/results/decoder_<data>.json)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    methods = {name: fn for name, fn in decoder_methods().items() if name in args.methods}
+    results = run(iter_corpus(args.payloads, args.seed), methods)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "seed": args.seed,
+            "payloads": args.payloads,
+            "images": next(iter(results.values()))["overall"]["count"],
+            "canvas_sizes": [f"{w}x{h}" for w, h in CANVAS_SIZES],
+            "degradations": list(DEGRADATIONS),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"decoder_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    _print_report(report, baseline)
+    print(f"\nResultados gravados em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# Benchmark ponta a ponta dos fluxos de cadastro, leitura e listagem, sem Supabase real.
+#
+# Os apps rodam pelo AppTest do Streamlit com o cliente Supabase trocado pelo FakeSupabase
+# (benchmarks/fake_supabase.py), com latência artificial por ida ao servidor.
+# Para cada fluxo são medidos o tempo de parede e a quantidade de idas ao servidor por tipo.
+#
+# Uso (a partir da raiz do repositório):
+#   python -m benchmarks.bench_e2e
+#   python -m benchmarks.bench_e2e --app app_supabase.py --latency 0.05 --products 2000 --output e2e.json
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import streamlit as st
+import supabase
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.fake_supabase import FakeSupabase
+from metrics import registry
+from qr_render import render_png
+
+
+BUCKET = "products"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configuração de cada app: IDs numéricos por categoria (primeiro ID de cada uma) ou UUIDs
+APPS = {
+    "app.py": {"numeric_ids": True, "categories": {"nexthub": 100001, "nextonline": 150001, "nextevents": 200001}},
+    "app_supabase.py": {"numeric_ids": False, "categories": None},
+}
+
+
+def _product_image(seed):
+    buffer = BytesIO()
+    Image.new("RGB", (1200, 900), ((seed * 37) % 255, (seed * 91) % 255, 120)).save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def seed_products(fake, app, count):
+    config = APPS[app]
+    bucket = fake.storage.from_(BUCKET)
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        if config["numeric_ids"]:
+            categories = list(config["categories"])
+            category = categories[i % len(categories)]
+            product_id = config["categories"][category] + i // len(categories)
+        else:
+            category = None
+            product_id = str(uuid.UUID(int=i + 1, version=4))
+        row = {
+            "id": product_id,
+            "name": f"Produto {i}",
+            "description": "Produto de teste",
+            "creation_date": (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+            "image_url": bucket.get_public_url(f"{product_id}.jpg"),
+            "qr_code_url": bucket.get_public_url(f"{product_id}_qrcode.png"),
+        }
+        if category:
+            row.update({"category": category, "price": 10.0 + i})
+        rows.append(row)
+        fake.buckets.setdefault(BUCKET, {})[f"{product_id}_qrcode.png"] = b""
+    fake.table("products").insert(rows).execute()
+
+    # Mesma inicialização dos contadores de ID feita por sql/002_product_id_counters.sql
+    if config["numeric_ids"]:
+        last_ids = {}
+        for row in rows:
+            last_ids[row["category"]] = max(last_ids.get(row["category"], 0), row["id"])
+        fake.tables["product_id_counters"] = [
+            {"category": category, "next_id": last_id + 1} for category, last_id in last_ids.items()
+        ]
+    fake.reset_calls()
+    return [row["id"] for row in rows]
+
+
+def _widget(elements, label):
+    return next(element for element in elements if element.label.startswith(label))
+
+
+def _new_app_test(app):
+    at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=120)
+    at.secrets["supabase"] = {"supabase_url": "http://fake-supabase.local", "supabase_key": "fake",
+                              "bucket_name": BUCKET}
+    return at
+
+
+def _measure(fake, at):
+    fake.reset_calls()
+    started = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    if at.error:
+        raise RuntimeError(at.error[0].value)
+    return {"ms": elapsed * 1000, "calls": dict(fake.calls)}
+
+
+def flow_create(fake, at, app, i):
+    _widget(at.sidebar.radio, "Selecione").set_value("Gerar QR Code").run()
+    if APPS[app]["categories"]:
+        categories = list(APPS[app]["categories"])
+        _widget(at.selectbox, "Categoria").set_value(categories[i % len(categories)])
+        _widget(at.number_input, "Valor").set_value(19.9)
+    _widget(at.text_input, "Nome").set_value(f"Novo produto {i}")
+    _widget(at.text_area, "Descrição").set_value("Cadastrado pelo benchmark")
+    _widget(at.file_uploader, "Upload da Imagem").set_value((f"foto_{i}.jpg", _product_image(i), "image/jpeg"))
+    _widget(at.button, "Gerar QR Code").click()
+    return _measure(fake, at)
+
+
+def flow_scan(fake, at, app, product_id):
+    _widget(at.sidebar.radio, "Selecione").set_value("Ler QR Code").run()
+    _widget(at.radio, "Escolha o método").set_value("Upload de Imagem").run()
+    _widget(at.file_uploader, "Carregue uma imagem").set_value(
+        ("qrcode.png", render_png(str(product_id), box_size=6), "image/png"))
+    return _measure(fake, at)
+
+
+def flow_list(fake, at, app, i):
+    _widget(at.sidebar.radio, "Selecione").set_value("Ver Produtos Cadastrados")
+    return _measure(fake, at)
+
+
+def _summary(samples):
+    times = sorted(sample["ms"] for sample in samples)
+    calls = Counter()
+    for sample in samples:
+        calls.update(sample["calls"])
+    return {
+        "runs": len(samples),
+        "mean_ms": statistics.fmean(times),
+        "p50_ms": times[len(times) // 2],
+        "max_ms": times[-1],
+        "round_trips_per_run": sum(calls.values()) / len(samples),
+        "round_trips_by_kind": {kind: count / len(samples) for kind, count in sorted(calls.items())},
+        "stages_ms": _stages(),
+    }
+
+
+# Tempo médio por etapa, a partir dos spans de metrics.py registrados durante o fluxo
+def _stages():
+    stages = {}
+    for metric in registry.snapshot():
+        labels = ",".join(f"{k}={v}" for k, v in metric["labels"].items())
+        name = f"{metric['stage']}[{labels}]" if labels else metric["stage"]
+        stages[name] = {"count": metric["count"], "mean_ms": metric["sum"] / metric["count"] * 1000}
+    return stages
+
+
+def run(app, runs, products, latency):
+    fake = FakeSupabase(latency=latency)
+    original_create_client = supabase.create_client
+    supabase.create_client = lambda *args, **kwargs: fake
+    os.environ.setdefault("SUPABASE_URL", fake.url)
+    os.environ.setdefault("SUPABASE_KEY", "fake")
+    os.environ.setdefault("BUCKET_NAME", BUCKET)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+    try:
+        product_ids = seed_products(fake, app, products)
+        at = _new_app_test(app)
+        at.run()
+
+        results = {}
+        for name, flow, args in (
+            ("create", flow_create, lambda i: i),
+            ("scan", flow_scan, lambda i: product_ids[(i * 7919) % len(product_ids)]),
+            ("list", flow_list, lambda i: i),
+        ):
+            registry.reset()
+            results[name] = _summary([flow(fake, at, app, args(i)) for i in range(runs)])
+        return results
+    finally:
+        supabase.create_client = original_create_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta com Supabase simulado")
+    parser.add_argument("--app", choices=list(APPS), default="app.py")
+    parser.add_argument("--runs", type=int, default=5, help="execuções por fluxo")
+    parser.add_argument("--products", type=int, default=500, help="produtos pré-cadastrados")
+    parser.add_argument("--latency", type=float, default=0.02, help="segundos por ida ao servidor")
+    parser.add_argument("--output", help="arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = run(args.app, args.runs, args.products, args.latency)
+
+    print(f"{'fluxo':<8} {'média ms':>10} {'p50 ms':>10} {'idas/execução':>14}")
+    for name, result in results.items():
+        print(f"{name:<8} {result['mean_ms']:>10.1f} {result['p50_ms']:>10.1f} {result['round_trips_per_run']:>14.1f}"
+              f"   {result['round_trips_by_kind']}")
+        for stage, timing in result["stages_ms"].items():
+            print(f"    {stage:<40} {timing['mean_ms']:>8.2f} ms  x{timing['count']}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "app": args.app,
+                "runs": args.runs,
+                "products": args.products,
+                "latency_s": args.latency,
+                "python": platform.python_version(),
+                "streamlit": st.__version__,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
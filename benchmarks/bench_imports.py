@@ -0,0 +1,196 @@
+# Benchmark de tempo de importação e de primeira renderização de cada página.
+#
+# 1. Custo de importação de cada dependência pesada, medido com `python -X importtime`
+#    num interpretador novo (tempo cumulativo do módulo de topo, mediana de várias execuções).
+# 2. Para cada app e página: num processo novo, o tempo da primeira execução do script
+#    (partida a frio, página inicial) e o da primeira visita à página, com as dependências
+#    pesadas que ficaram carregadas depois de cada uma.
+#
+# Os apps Supabase usam o FakeSupabase (sem rede); o app_init roda numa cópia temporária do
+# repositório, para não alterar o products.db versionado. O pacote supabase é importado antes
+# da medição (para trocar o cliente) e por isso não entra no tempo de partida.
+#
+# Uso (a partir da raiz do repositório):
+#   python -m benchmarks.bench_imports
+#   python -m benchmarks.bench_imports --output benchmarks/results/imports_depois.json \
+#       --compare benchmarks/results/imports_antes.json
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["streamlit", "supabase", "cv2", "pyzbar.pyzbar", "pandas", "numpy", "PIL.Image", "qrcode"]
+
+PAGES = {
+    "app.py": ["Gerar QR Code", "Importar em Lote", "Ler QR Code", "Ver Produtos Cadastrados", "Etiquetas",
+               "Exportar Catálogo", "Manutenção"],
+    "app_supabase.py": ["Gerar QR Code", "Importar em Lote", "Ler QR Code", "Ver Produtos Cadastrados",
+                        "Etiquetas", "Exportar Catálogo", "Manutenção"],
+    "app_init.py": ["Gerar QR Code", "Ler QR Code", "Ver Produtos Cadastrados", "Exportar Catálogo"],
+}
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_cost_ms(module, runs):
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True, cwd=ROOT)
+        if completed.returncode != 0:
+            return None
+        for line in completed.stderr.splitlines():
+            match = _IMPORTTIME_LINE.match(line)
+            if match and match.group(4) == module and len(match.group(3)) == 1:
+                samples.append(int(match.group(2)) / 1000)
+    return statistics.median(samples) if samples else None
+
+
+# Executado no processo filho: mede a partida a frio e a primeira visita a uma página
+def _child(app, page):
+    if app != "app_init.py":
+        import supabase
+        from benchmarks.fake_supabase import FakeSupabase
+
+        fake = FakeSupabase()
+        fake.table("products").insert([{
+            "id": 100001 + i if app == "app.py" else f"00000000-0000-4000-8000-{i:012d}",
+            "category": "nexthub",
+            "price": 10.0,
+            "name": f"Produto {i}",
+            "description": "Produto de teste",
+            "creation_date": f"2025-01-01 00:{i:02d}:00",
+            "image_url": "http://fake-supabase.local/imagem.jpg",
+            "qr_code_url": "http://fake-supabase.local/qrcode.png",
+        } for i in range(20)]).execute()
+        supabase.create_client = lambda *args, **kwargs: fake
+        os.environ.update({"SUPABASE_URL": fake.url, "SUPABASE_KEY": "fake", "BUCKET_NAME": "products"})
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(os.getcwd(), app), default_timeout=120)
+    at.secrets["supabase"] = {"supabase_url": "http://fake-supabase.local", "supabase_key": "fake",
+                              "bucket_name": "products"}
+
+    def loaded():
+        return [m for m in HEAVY_MODULES if m in sys.modules]
+
+    started = time.perf_counter()
+    at.run()
+    cold_start_ms = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    modules_after_start = loaded()
+
+    started = time.perf_counter()
+    next(r for r in at.sidebar.radio if r.label.startswith("Selecione")).set_value(page).run()
+    page_ms = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    print(json.dumps({
+        "cold_start_ms": cold_start_ms,
+        "modules_after_start": modules_after_start,
+        "first_visit_ms": page_ms,
+        "modules_after_page": loaded(),
+    }))
+
+
+def page_timings(app, page, workdir):
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_imports", "--child", app, page],
+        capture_output=True, text=True, cwd=workdir
+    )
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        return {"error": (completed.stderr.strip().splitlines() or ["falhou"])[-1]}
+    return json.loads(lines[-1])
+
+
+def _copy_tree():
+    workdir = tempfile.mkdtemp(prefix="bench_imports_")
+    for name in os.listdir(ROOT):
+        if name.endswith(".py") or name == "products.db":
+            shutil.copy2(os.path.join(ROOT, name), workdir)
+    shutil.copytree(os.path.join(ROOT, "benchmarks"), os.path.join(workdir, "benchmarks"),
+                    ignore=shutil.ignore_patterns("results", "__pycache__"))
+    return workdir
+
+
+def _print_report(report, baseline=None):
+    print(f"{'módulo':<16} {'importação ms':>14}")
+    for module, cost in report["imports_ms"].items():
+        line = f"{module:<16} {cost:>14.1f}" if cost is not None else f"{module:<16} {'indisponível':>14}"
+        print(line)
+
+    print()
+    print(f"{'app':<16} {'página':<26} {'partida ms':>11} {'1ª visita ms':>13}  carregados após a página")
+    for app, pages in report["pages"].items():
+        for page, result in pages.items():
+            if "error" in result:
+                print(f"{app:<16} {page:<26} erro: {result['error']}")
+                continue
+            line = (f"{app:<16} {page:<26} {result['cold_start_ms']:>11.0f} {result['first_visit_ms']:>13.0f}  "
+                    f"{', '.join(result['modules_after_page'])}")
+            old = (baseline or {}).get("pages", {}).get(app, {}).get(page)
+            if old and "error" not in old:
+                line += (f"   Δ partida {result['cold_start_ms'] - old['cold_start_ms']:+.0f} ms"
+                         f"  Δ visita {result['first_visit_ms'] - old['first_visit_ms']:+.0f} ms")
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação e de primeira renderização por página")
+    parser.add_argument("--apps", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--runs", type=int, default=5, help="execuções de -X importtime por módulo")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: benchmarks/results/imports_<data>.json)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--child", nargs=2, metavar=("APP", "PAGE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    workdir = _copy_tree()
+    try:
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "imports_ms": {module: import_cost_ms(module, args.runs) for module in HEAVY_MODULES},
+            "pages": {app: {page: page_timings(app, page, workdir) for page in PAGES[app]} for app in args.apps},
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"imports_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    _print_report(report, baseline)
+    print(f"\nResultados gravados em {output}")
+
+
+if __name__ == "__main__":
+    main()
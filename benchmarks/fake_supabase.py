@@ -0,0 +1,383 @@
+# Substituto em memória do cliente Supabase, para medir os apps sem um projeto real.
+#
+# Implementa o subconjunto usado pelos apps: table().select/insert/update/delete com
+# eq/neq/lt/lte/gt/gte/in_/or_/order/limit/range, rpc() e storage.from_() com
+# upload/download/exists/remove/list/get_public_url. Cada ida ao "servidor" é contada por tipo
+# e pode receber uma latência artificial, para simular a rede.
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from datetime import datetime, timezone
+
+
+class FakeSupabaseError(Exception):
+    pass
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+
+def _store_value(value):
+    # O Postgres devolve timestamps no formato ISO com "T"
+    if isinstance(value, str) and _TIMESTAMP.match(value):
+        return value.replace(" ", "T", 1)
+    return value
+
+
+def _coerce(row_value, value):
+    if isinstance(row_value, bool):
+        return value in (True, "true")
+    if isinstance(row_value, int):
+        return int(value)
+    if isinstance(row_value, float):
+        return float(value)
+    return _store_value(str(value))
+
+
+def _compare(op, row_value, value):
+    if op == "is":
+        return row_value is None if str(value) == "null" else row_value == value
+    if row_value is None:
+        return False
+    if op == "in":
+        return row_value in [_coerce(row_value, v) for v in value]
+    if op in ("like", "ilike"):
+        pattern = "^" + re.escape(str(value)).replace("%", ".*").replace(r"\*", ".*") + "$"
+        return re.match(pattern, str(row_value), re.IGNORECASE if op == "ilike" else 0) is not None
+    value = _coerce(row_value, value)
+    return {
+        "eq": row_value == value,
+        "neq": row_value != value,
+        "lt": row_value < value,
+        "lte": row_value <= value,
+        "gt": row_value > value,
+        "gte": row_value >= value,
+    }[op]
+
+
+# Parser da sintaxe de filtros lógicos do PostgREST: a.lt.1,and(b.eq."x",c.gt.2)
+def _split_top_level(expr):
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in expr:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+
+def _parse_condition(expr):
+    expr = expr.strip()
+    for logic in ("and", "or"):
+        if expr.startswith(logic + "(") and expr.endswith(")"):
+            children = [_parse_condition(part) for part in _split_top_level(expr[len(logic) + 1:-1])]
+            combine = all if logic == "and" else any
+            return lambda row: combine(child(row) for child in children)
+
+    column, op, value = expr.split(".", 2)
+    negate = op == "not"
+    if negate:
+        op, value = value.split(".", 1)
+    if op == "in":
+        value = [v.strip('"') for v in _split_top_level(value.strip("()"))]
+    else:
+        value = value.strip('"')
+
+    def condition(row):
+        result = _compare(op, row.get(column), value)
+        return not result if negate else result
+    return condition
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._columns = None
+        self._count = None
+        self._payload = None
+        self._filters = []
+        self._order = []
+        self._limit = None
+        self._offset = 0
+
+    # Operações
+    def select(self, *columns, count=None):
+        self._action = "select"
+        joined = ",".join(columns) if columns else "*"
+        self._columns = None if joined.strip() == "*" else [c.strip() for c in joined.split(",")]
+        self._count = count
+        return self
+
+    def insert(self, rows):
+        self._action = "insert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values):
+        self._action = "update"
+        self._payload = values
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    # Filtros
+    def _filter(self, op, column, value):
+        self._filters.append(lambda row: _compare(op, row.get(column), value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter("eq", column, value)
+
+    def neq(self, column, value):
+        return self._filter("neq", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def gte(self, column, value):
+        return self._filter("gte", column, value)
+
+    def ilike(self, column, value):
+        return self._filter("ilike", column, value)
+
+    def in_(self, column, values):
+        return self._filter("in", column, list(values))
+
+    def or_(self, expr):
+        self._filters.append(_parse_condition(f"or({expr})"))
+        return self
+
+    # Ordenação e paginação
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def range(self, start, end):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def _matches(self, row):
+        return all(condition(row) for condition in self._filters)
+
+    def execute(self):
+        self._client._round_trip(f"table.{self._action}")
+        with self._client._lock:
+            rows = self._client.tables.setdefault(self._table, [])
+
+            if self._action == "insert":
+                inserted = []
+                for payload in self._payload:
+                    row = {key: _store_value(value) for key, value in payload.items()}
+                    if "id" in row and any(existing.get("id") == row["id"] for existing in rows):
+                        raise FakeSupabaseError(f"duplicate key value violates unique constraint (id={row['id']})")
+                    inserted.append(row)
+                rows.extend(inserted)
+                return FakeResponse([dict(row) for row in inserted])
+
+            if self._action == "update":
+                updated = []
+                for row in rows:
+                    if self._matches(row):
+                        row.update({key: _store_value(value) for key, value in self._payload.items()})
+                        updated.append(dict(row))
+                return FakeResponse(updated)
+
+            if self._action == "delete":
+                deleted = [row for row in rows if self._matches(row)]
+                self._client.tables[self._table] = [row for row in rows if not self._matches(row)]
+                return FakeResponse(deleted)
+
+            selected = [row for row in rows if self._matches(row)]
+            for column, desc in reversed(self._order):
+                selected.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            count = len(selected) if self._count else None
+            selected = selected[self._offset:]
+            if self._limit is not None:
+                selected = selected[:self._limit]
+            if self._columns:
+                selected = [{c: row.get(c) for c in self._columns} for row in selected]
+            else:
+                selected = [dict(row) for row in selected]
+            return FakeResponse(selected, count)
+
+
+class FakeBucket:
+    def __init__(self, client, name):
+        self._client = client
+        self._name = name
+        self._objects = client.buckets.setdefault(name, {})
+        self._created = client.bucket_times.setdefault(name, {})
+
+    def upload(self, path, file, file_options=None):
+        self._client._round_trip("storage.upload")
+        upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+        with self._client._lock:
+            if path in self._objects and not upsert:
+                raise FakeSupabaseError(f"The resource already exists: {path}")
+            self._objects[path] = bytes(file)
+            self._created.setdefault(path, datetime.now(timezone.utc).isoformat())
+        return {"path": path}
+
+    def download(self, path):
+        self._client._round_trip("storage.download")
+        with self._client._lock:
+            if path not in self._objects:
+                raise FakeSupabaseError(f"Object not found: {path}")
+            return self._objects[path]
+
+    def exists(self, path):
+        self._client._round_trip("storage.exists")
+        with self._client._lock:
+            return path in self._objects
+
+    def remove(self, paths):
+        self._client._round_trip("storage.remove")
+        with self._client._lock:
+            removed = [{"name": path} for path in paths if self._objects.pop(path, None) is not None]
+            for path in paths:
+                self._created.pop(path, None)
+            return removed
+
+    # Como no Supabase: só o nível de path; pastas vêm com id None e sem metadata
+    def list(self, path=None, options=None):
+        self._client._round_trip("storage.list")
+        options = options or {}
+        offset = options.get("offset", 0)
+        limit = options.get("limit", 100)
+        prefix = f"{path.strip('/')}/" if path and path.strip("/") else ""
+        entries = {}
+        with self._client._lock:
+            for object_path, data in self._objects.items():
+                if not object_path.startswith(prefix):
+                    continue
+                name, _, rest = object_path[len(prefix):].partition("/")
+                if rest:
+                    entries[name] = {"name": name, "id": None, "metadata": None}
+                else:
+                    created_at = self._created.get(object_path)
+                    entries[name] = {"name": name, "id": object_path, "created_at": created_at,
+                                     "updated_at": created_at, "metadata": {"size": len(data)}}
+        return [entries[name] for name in sorted(entries)[offset:offset + limit]]
+
+    # Como no cliente real, a URL pública é montada localmente (sem ida ao servidor)
+    def get_public_url(self, path):
+        return f"{self._client.url}/storage/v1/object/public/{self._name}/{path}"
+
+
+class FakeStorage:
+    def __init__(self, client):
+        self._client = client
+
+    def from_(self, bucket_name):
+        return FakeBucket(self._client, bucket_name)
+
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self._client = client
+        self._name = name
+        self._params = params
+
+    def execute(self):
+        self._client._round_trip(f"rpc.{self._name}")
+        with self._client._lock:
+            return FakeResponse(self._client.functions[self._name](self._client, **self._params))
+
+
+def _reserve_product_ids(client, p_category, p_count, p_start):
+    counters = client.tables.setdefault("product_id_counters", [])
+    for counter in counters:
+        if counter["category"] == p_category:
+            counter["next_id"] += p_count
+            return counter["next_id"] - p_count
+    counters.append({"category": p_category, "next_id": p_start + p_count})
+    return p_start
+
+
+def _fold(text):
+    return unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+
+
+# Aproximação da função search_products: todos os termos casam por prefixo com alguma
+# palavra do nome ou da descrição; acertos no nome valem mais
+def _search_products(client, p_query, p_category=None, p_limit=20, p_offset=0):
+    terms = re.findall(r"\w+", _fold(p_query))
+    ranked = []
+    for row in client.tables.get("products", []):
+        if p_category is not None and row.get("category") != p_category:
+            continue
+        name_words = re.findall(r"\w+", _fold(row.get("name")))
+        description_words = re.findall(r"\w+", _fold(row.get("description")))
+        score = 0
+        for term in terms:
+            in_name = any(word.startswith(term) for word in name_words)
+            if not in_name and not any(word.startswith(term) for word in description_words):
+                break
+            score += 2 if in_name else 1
+        else:
+            if terms:
+                ranked.append((score, row.get("creation_date") or "", row["id"], row))
+    ranked.sort(key=lambda item: item[:3], reverse=True)
+    return [dict(item[3]) for item in ranked[p_offset:p_offset + p_limit]]
+
+
+class FakeSupabase:
+    def __init__(self, latency=0.0, url="http://fake-supabase.local"):
+        # latency: segundos por ida ao servidor, ou dicionário por tipo ("table.select", "storage.upload"...)
+        self.latency = latency
+        self.url = url
+        self.tables = {}
+        self.buckets = {}
+        self.bucket_times = {}
+        self.functions = {"reserve_product_ids": _reserve_product_ids, "search_products": _search_products}
+        self.calls = Counter()
+        self.storage = FakeStorage(self)
+        self._lock = threading.RLock()
+
+    def _round_trip(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        latency = self.latency.get(kind, 0.0) if isinstance(self.latency, dict) else self.latency
+        if latency:
+            time.sleep(latency)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return FakeRpc(self, name, params or {})
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
@@ -0,0 +1,80 @@
+from image_store import IMAGE_COLUMNS, ImageStore
+from metrics import span
+
+
+# Colunas necessárias para excluir um produto e os objetos dele no storage
+DELETE_COLUMNS = ("id",) + IMAGE_COLUMNS
+
+# Quantidade máxima de caminhos por chamada de remove() no storage
+REMOVE_CHUNK = 100
+
+
+# Aplica o filtro da exclusão em lote: categoria e período de cadastro ([created_from, created_before))
+def apply_filters(query, category=None, created_from=None, created_before=None):
+    if category:
+        query = query.eq("category", category)
+    if created_from:
+        query = query.gte("creation_date", created_from)
+    if created_before:
+        query = query.lt("creation_date", created_before)
+    return query
+
+
+# Exclusão em massa: busca os produtos do filtro em lotes, exclui cada lote com um único
+# delete().in_() e remove do storage, em blocos, os QR Codes e as imagens que ficaram sem
+# referência. As linhas saem antes dos objetos: se o storage falhar, sobram só objetos
+# órfãos, que a varredura do storage_gc.py recolhe depois.
+class BulkDeleter:
+    def __init__(self, client, bucket_name, batch_size=200, remove_chunk=REMOVE_CHUNK):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.batch_size = batch_size
+        self.remove_chunk = remove_chunk
+        self.images = ImageStore(client, bucket_name)
+
+    def count(self, **filters):
+        query = self.client.table('products').select("id", count="exact")
+        return apply_filters(query, **filters).limit(1).execute().count or 0
+
+    def _remove(self, paths):
+        bucket = self.client.storage.from_(self.bucket_name)
+        for start in range(0, len(paths), self.remove_chunk):
+            bucket.remove(paths[start:start + self.remove_chunk])
+
+    # Devolve os IDs excluídos e a quantidade de objetos removidos do storage
+    def run(self, on_progress=None, **filters):
+        deleted_ids = []
+        removed = 0
+        last_id = None
+        while True:
+            # Keyset por ID: linhas que o banco se recusar a excluir não voltam na próxima página
+            query = apply_filters(self.client.table('products').select(",".join(DELETE_COLUMNS)), **filters)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            batch = query.order("id").limit(self.batch_size).execute().data
+            if not batch:
+                break
+            last_id = batch[-1]["id"]
+
+            with span("bulk_delete.batch"):
+                # Só o que o banco devolveu como excluído (RLS pode esconder linhas da exclusão)
+                deleted = self.client.table('products') \
+                    .delete() \
+                    .in_("id", [product["id"] for product in batch]) \
+                    .execute() \
+                    .data
+                if not deleted:
+                    raise RuntimeError("Nenhum produto do lote pôde ser excluído; exclusão interrompida")
+                deleted_set = {product["id"] for product in deleted}
+                products = [product for product in batch if product["id"] in deleted_set]
+                paths = self.images.unreferenced_paths_many(products)
+                paths.extend(f"{product['id']}_qrcode.png" for product in products)
+                self._remove(paths)
+
+            deleted_ids.extend(product["id"] for product in products)
+            removed += len(paths)
+            if on_progress:
+                on_progress(len(deleted_ids))
+            if len(batch) < self.batch_size:
+                break
+        return {"deleted_ids": deleted_ids, "removed_objects": removed}
@@ -0,0 +1,102 @@
+import csv
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from image_store import ImageStore
+from qr_render import render_profile_png
+
+
+CSV_COLUMNS = ["category", "name", "description", "price", "image"]
+
+
+# Lê o CSV de produtos; cada linha vira um dicionário com as colunas pedidas
+def read_products_csv(csv_file, columns=CSV_COLUMNS):
+    reader = csv.DictReader(csv_file.getvalue().decode("utf-8-sig").splitlines())
+    missing = [c for c in columns if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Colunas ausentes no CSV: {', '.join(missing)}")
+    return [{c: (row[c] or "").strip() for c in columns} for row in reader]
+
+
+# Arquivo ZIP com as imagens, indexado pelo nome do arquivo (sem as pastas)
+class ImageArchive:
+    def __init__(self, zip_file):
+        self._zip = zipfile.ZipFile(zip_file)
+        self._entries = {
+            os.path.basename(info.filename): info
+            for info in self._zip.infolist() if not info.is_dir()
+        }
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def read(self, name):
+        return self._zip.read(self._entries[name])
+
+
+# Importação em massa: uploads de imagem e QR Code em paralelo (pool limitado)
+# e inserção das linhas em lotes com um único insert por lote.
+# Produtos com a mesma foto compartilham os objetos da imagem (ver image_store.py).
+class BulkImporter:
+    def __init__(self, client, bucket_name, max_workers=8, batch_size=500):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.images = ImageStore(client, bucket_name)
+
+    def _upload(self, path, data, content_type):
+        bucket = self.client.storage.from_(self.bucket_name)
+        bucket.upload(path=path, file=data, file_options={"content-type": content_type})
+        return bucket.get_public_url(path)
+
+    # Recebe a linha já com o ID e o nome da imagem; devolve a linha pronta para o insert
+    # e os bytes economizados na imagem (normalização ou foto já existente no bucket)
+    def _prepare(self, product, archive):
+        row = dict(product)
+        image_name = row.pop("image")
+        product_id = row["id"]
+
+        image_bytes = archive.read(image_name)
+        image_key, image_ext = self.images.locate(image_bytes)
+        image_report = self.images.put(image_bytes, image_key)
+        row.update(self.images.urls(image_key, image_ext))
+        row["qr_code_url"] = self._upload(f"{product_id}_qrcode.png", render_profile_png(str(product_id)), "image/png")
+        return row, image_report["original_bytes"] - image_report["stored_bytes"]
+
+    def _flush(self, rows, failed):
+        if not rows:
+            return 0
+        try:
+            self.client.table('products').insert(rows).execute()
+            return len(rows)
+        except Exception as e:
+            failed.extend({"id": row["id"], "name": row["name"], "error": str(e)} for row in rows)
+            return 0
+
+    def run(self, products, archive, on_progress=None):
+        inserted = 0
+        bytes_saved = 0
+        failed = []
+        ready = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._prepare, product, archive): product for product in products}
+            for done, future in enumerate(as_completed(futures), start=1):
+                product = futures[future]
+                try:
+                    row, saved = future.result()
+                    ready.append(row)
+                    bytes_saved += saved
+                except Exception as e:
+                    failed.append({"id": product["id"], "name": product["name"], "error": str(e)})
+
+                if len(ready) >= self.batch_size:
+                    inserted += self._flush(ready, failed)
+                    ready = []
+                if on_progress:
+                    on_progress(done, len(futures))
+
+        inserted += self._flush(ready, failed)
+        return {"inserted": inserted, "failed": failed, "bytes_saved": bytes_saved}
@@ -0,0 +1,90 @@
+import csv
+import io
+
+
+# Exportação do catálogo em CSV ou Parquet, em fluxo: as linhas chegam de um gerador que
+# percorre a tabela em páginas (iter_products dos apps) e vão direto para o arquivo, então a
+# memória usada não depende do tamanho do catálogo.
+
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# Linhas acumuladas por row group do Parquet (o teto de memória da exportação)
+PARQUET_ROW_GROUP = 10000
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# out é um arquivo binário; on_progress recebe a quantidade de linhas já escritas
+def write_csv(rows, out, columns, on_progress=None, progress_every=1000):
+    text = io.TextIOWrapper(out, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    written = 0
+    for row in rows:
+        writer.writerow(["" if row.get(column) is None else row.get(column) for column in columns])
+        written += 1
+        if on_progress and written % progress_every == 0:
+            on_progress(written)
+    text.flush()
+    # O arquivo continua aberto para quem o passou
+    text.detach()
+    if on_progress:
+        on_progress(written)
+    return written
+
+
+# Os tipos vêm do primeiro bloco; colunas que nele só têm nulos viram texto, exceto price
+def _schema(chunk, columns):
+    import pyarrow as pa
+
+    inferred = pa.Table.from_pylist(chunk).schema
+    fields = []
+    for column in columns:
+        if column == "price":
+            fields.append(pa.field(column, pa.float64()))
+        elif column in inferred.names and not pa.types.is_null(inferred.field(column).type):
+            fields.append(inferred.field(column))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def write_parquet(rows, out, columns, on_progress=None, row_group=PARQUET_ROW_GROUP):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    written = 0
+    try:
+        for chunk in _chunks(({column: row.get(column) for column in columns} for row in rows), row_group):
+            if writer is None:
+                writer = pq.ParquetWriter(out, _schema(chunk, columns), compression="zstd")
+            writer.write_table(pa.Table.from_pylist(chunk, schema=writer.schema))
+            written += len(chunk)
+            if on_progress:
+                on_progress(written)
+        if writer is None:
+            # Nenhum produto: arquivo válido, só com o esquema
+            writer = pq.ParquetWriter(out, pa.schema([pa.field(column, pa.string()) for column in columns]))
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def write_export(rows, out, columns, export_format, on_progress=None):
+    if export_format == "Parquet":
+        return write_parquet(rows, out, columns, on_progress)
+    return write_csv(rows, out, columns, on_progress)
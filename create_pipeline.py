@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from image_store import ImageStore
+from metrics import span
+from qr_render import render_profile_png
+
+
+class CreatePipelineError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__("; ".join(f"{step}: {error}" for step, error in failures.items()))
+
+
+# Cadastro de produto com as etapas independentes executadas em paralelo:
+# normalização + upload da imagem e das variantes reduzidas (pulados se a mesma foto já está
+# no bucket, ver image_store.py), geração + upload do QR Code e insert da linha.
+# Todo o trabalho pesado roda no pool, fora da thread do script do Streamlit.
+# As URLs públicas são montadas localmente, então o insert não precisa esperar os uploads.
+# Se alguma etapa falhar, o que foi gravado por este cadastro é desfeito.
+class CreatePipeline:
+    def __init__(self, client, bucket_name, max_workers=8):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.images = ImageStore(client, bucket_name)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _upload(self, path, data, content_type):
+        self.client.storage.from_(self.bucket_name).upload(
+            path=path,
+            file=data,
+            file_options={"content-type": content_type}
+        )
+
+    def _upload_qr_code(self, path, qr_payload):
+        with span("create.render_qr"):
+            data = render_profile_png(qr_payload)
+        self._upload(path, data, "image/png")
+
+    def _insert(self, row):
+        self.client.table('products').insert(row).execute()
+
+    def _rollback(self, row, image_paths, qr_path, inserted):
+        try:
+            if inserted:
+                self.client.table('products').delete().eq('id', row['id']).execute()
+            paths = []
+            if image_paths:
+                # Outro cadastro com a mesma foto pode ter encontrado a imagem no bucket e gravado a
+                # linha dele: só sai o que continua sem referência
+                unreferenced = set(self.images.unreferenced_paths(row))
+                paths.extend(path for path in image_paths if path in unreferenced)
+            if qr_path:
+                paths.append(qr_path)
+            if paths:
+                self.client.storage.from_(self.bucket_name).remove(paths)
+        except Exception:
+            pass
+
+    def _submit(self, step, func, *args):
+        return self._executor.submit(self._timed, step, func, *args)
+
+    def _timed(self, step, func, *args):
+        with span("create.step", step=step):
+            return func(*args)
+
+    # Devolve a linha gravada e o relatório da imagem (bytes recebidos e gravados)
+    def create(self, row, image_bytes, qr_payload):
+        with span("create.total"):
+            return self._create(row, image_bytes, qr_payload)
+
+    def _create(self, row, image_bytes, qr_payload):
+        bucket = self.client.storage.from_(self.bucket_name)
+        qr_path = f"{row['id']}_qrcode.png"
+        image_key, image_ext = self.images.locate(image_bytes)
+        row = {
+            **row,
+            **self.images.urls(image_key, image_ext),
+            "qr_code_url": bucket.get_public_url(qr_path),
+        }
+
+        steps = {
+            "imagem": self._submit("image", self.images.put, image_bytes, image_key),
+            "QR code": self._submit("qr_code", self._upload_qr_code, qr_path, qr_payload),
+            "banco de dados": self._submit("insert", self._insert, row),
+        }
+        wait(steps.values())
+
+        failures = {step: future.exception() for step, future in steps.items() if future.exception()}
+        if failures:
+            # Só o que este cadastro enviou: uma imagem compartilhada com outros produtos fica
+            image_paths = steps["imagem"].result()["paths"] if "imagem" not in failures else []
+            self._rollback(row, image_paths, qr_path if "QR code" not in failures else None,
+                           inserted="banco de dados" not in failures)
+            raise CreatePipelineError(failures)
+        return row, steps["imagem"].result()
@@ -0,0 +1,44 @@
+import threading
+
+
+# Alocador de IDs por categoria.
+# O servidor reserva blocos de IDs de forma atômica (função reserve_product_ids, ver sql/)
+# e o cliente entrega os IDs do bloco localmente, sem consultar a tabela antes de cada insert.
+# IDs de um bloco não usado até o processo terminar são descartados (ficam lacunas na sequência).
+class BlockIdAllocator:
+    def __init__(self, client, first_ids, block_size=20):
+        self.client = client
+        self.first_ids = first_ids
+        self.block_size = block_size
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def _reserve(self, category, count):
+        response = self.client.rpc('reserve_product_ids', {
+            "p_category": category,
+            "p_count": count,
+            "p_start": self.first_ids[category]
+        }).execute()
+        return response.data
+
+    # Devolve count IDs únicos da categoria, em ordem crescente: primeiro o que resta do bloco
+    # local, depois um bloco novo de max(faltantes, block_size). Só são consecutivos dentro de
+    # cada bloco; entre o resto do bloco antigo e o novo pode haver IDs de outros processos.
+    def take(self, category, count=1):
+        with self._lock:
+            next_id, end = self._blocks.get(category, (0, 0))
+            ids = list(range(next_id, min(end, next_id + count)))
+
+            missing = count - len(ids)
+            if missing:
+                start = self._reserve(category, max(missing, self.block_size))
+                ids.extend(range(start, start + missing))
+                next_id, end = start + missing, start + max(missing, self.block_size)
+            else:
+                next_id += count
+
+            self._blocks[category] = (next_id, end)
+            return ids
+
+    def next_id(self, category):
+        return self.take(category)[0]
@@ -0,0 +1,135 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from image_variants import VARIANTS, make_variants, normalize_image, normalized_format, variant_name
+from metrics import span
+
+
+# Armazenamento das imagens de produto endereçado pelo conteúdo.
+#
+# A imagem e as variantes ficam em images/<sha256 dos bytes enviados>, então produtos com a
+# mesma foto apontam para os mesmos objetos: o upload é pulado quando o objeto já existe.
+# Antes de gravar, a imagem é normalizada (ver image_variants.normalize_image); a chave é a do
+# arquivo enviado, e a extensão, a do formato normalizado.
+# A contagem de referências é a própria tabela products: na exclusão, os objetos só são
+# removidos quando nenhum outro produto aponta para a mesma image_url.
+
+IMAGE_PREFIX = "images"
+
+# Colunas da tabela products com URLs de objetos da imagem
+IMAGE_COLUMNS = ("image_url",) + tuple(f"{variant}_url" for variant in VARIANTS)
+
+
+def content_key(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def image_object_path(key, ext):
+    return f"{IMAGE_PREFIX}/{key}.{ext.lower()}"
+
+
+def variant_object_path(key, variant):
+    return f"{IMAGE_PREFIX}/{variant_name(key, variant)}"
+
+
+# Caminho do objeto dentro do bucket a partir da URL pública (também para as URLs antigas, sem pasta)
+def object_path(url, bucket_name):
+    return url.split("?")[0].split(f"/{bucket_name}/", 1)[-1]
+
+
+class ImageStore:
+    def __init__(self, client, bucket_name, max_workers=4, lock_stripes=64):
+        self.client = client
+        self.bucket_name = bucket_name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Uploads simultâneos da mesma imagem (importação em lote) esperam um pelo outro
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
+
+    def _bucket(self):
+        return self.client.storage.from_(self.bucket_name)
+
+    # Chave e extensão do objeto da imagem (só o cabeçalho da imagem é lido)
+    def locate(self, image_bytes):
+        return content_key(image_bytes), normalized_format(image_bytes)[0]
+
+    # URLs públicas da imagem e das variantes, montadas localmente
+    def urls(self, key, ext):
+        bucket = self._bucket()
+        return {
+            "image_url": bucket.get_public_url(image_object_path(key, ext)),
+            **{f"{variant}_url": bucket.get_public_url(variant_object_path(key, variant)) for variant in VARIANTS}
+        }
+
+    def _upload(self, path, data, content_type):
+        self._bucket().upload(path=path, file=data, file_options={"content-type": content_type, "upsert": "true"})
+
+    # Normaliza e grava a imagem e as variantes, se ainda não existirem. Devolve os caminhos
+    # enviados agora (vazio quando a imagem já estava no bucket), que são os únicos que um
+    # rollback pode remover, e os tamanhos do arquivo recebido e do gravado (0 se reaproveitado).
+    def put(self, image_bytes, key=None):
+        ext, content_type = normalized_format(image_bytes)
+        key = key or content_key(image_bytes)
+        path = image_object_path(key, ext)
+        bucket = self._bucket()
+        report = {"paths": [], "original_bytes": len(image_bytes), "stored_bytes": 0}
+        with self._locks[int(key[:8], 16) % len(self._locks)]:
+            if bucket.exists(path):
+                return report
+
+            with span("images.normalize"):
+                normalized = normalize_image(image_bytes)
+
+            # O original sobe enquanto as variantes são geradas; depois as variantes sobem em paralelo.
+            # Os objetos de uma chave têm sempre o mesmo conteúdo, então sobrescrever é seguro.
+            uploads = {path: self._executor.submit(self._upload, path, normalized, content_type)}
+            try:
+                with span("images.make_variants"):
+                    variants = make_variants(normalized)
+                for variant, data in variants.items():
+                    variant_path = variant_object_path(key, variant)
+                    uploads[variant_path] = self._executor.submit(self._upload, variant_path, data, "image/webp")
+            finally:
+                wait(uploads.values())
+
+            errors = [future.exception() for future in uploads.values() if future.exception()]
+            if errors:
+                # Outro processo pode ter visto o original já enviado e gravado um produto com ele
+                unreferenced = set(self.unreferenced_paths(self.urls(key, ext)))
+                uploaded = [p for p, future in uploads.items() if not future.exception() and p in unreferenced]
+                if uploaded:
+                    bucket.remove(uploaded)
+                raise errors[0]
+            return {**report, "paths": list(uploads), "stored_bytes": len(normalized)}
+
+    # Objetos da imagem que ficaram sem referência depois da exclusão do produto
+    def unreferenced_paths(self, product):
+        if not product.get("image_url"):
+            return []
+        response = self.client.table('products') \
+            .select("id", count="exact") \
+            .eq("image_url", product["image_url"]) \
+            .limit(1) \
+            .execute()
+        if response.count:
+            return []
+        return [object_path(product[column], self.bucket_name) for column in IMAGE_COLUMNS if product.get(column)]
+
+    # Versão em lote, para a exclusão de muitos produtos (já removidos da tabela): uma consulta
+    # por bloco de URLs, em vez de uma contagem por produto
+    def unreferenced_paths_many(self, products, chunk_size=200):
+        by_url = {product["image_url"]: product for product in products if product.get("image_url")}
+        urls = list(by_url)
+        referenced = set()
+        for start in range(0, len(urls), chunk_size):
+            rows = self.client.table('products') \
+                .select("image_url") \
+                .in_("image_url", urls[start:start + chunk_size]) \
+                .execute() \
+                .data
+            referenced.update(row["image_url"] for row in rows)
+        return [
+            object_path(product[column], self.bucket_name)
+            for url, product in by_url.items() if url not in referenced
+            for column in IMAGE_COLUMNS if product.get(column)
+        ]
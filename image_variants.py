@@ -0,0 +1,145 @@
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image, ImageCms, ImageOps
+
+
+# Variantes geradas no cadastro: nome -> largura máxima em pixels.
+# A listagem usa a miniatura e a tela de leitura usa a média; o original fica para download.
+VARIANTS = {
+    "thumbnail": 240,
+    "medium": 640,
+}
+
+VARIANT_FORMAT = "webp"
+VARIANT_QUALITY = 80
+
+# Normalização da imagem enviada, antes de gravar: orientação EXIF aplicada, lado maior limitado,
+# metadados removidos (o perfil de cor ICC é mantido) e nova compressão. Uma imagem que não
+# precisa de nada disso fica como veio, a menos que a nova compressão a deixe menor.
+NORMALIZE_MAX_SIDE = 2048
+NORMALIZE_QUALITY = 85
+
+# Chaves de Image.info com metadados que não precisam ir para o storage
+METADATA_KEYS = {"exif", "xmp", "XML:com.adobe.xmp", "comment", "photoshop"}
+
+# Formatos que podem ser gravados como vieram: formato do PIL -> (extensão, content-type)
+KEEP_FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "WEBP": ("webp", "image/webp"),
+}
+
+# Modos que não precisam de conversão de cores para serem exibidos
+KEEP_MODES = {"1", "L", "LA", "P", "PA", "RGB", "RGBA"}
+
+
+def variant_name(product_id, variant):
+    return f"{product_id}_{variant}.{VARIANT_FORMAT}"
+
+
+def make_variants(image_bytes, variants=VARIANTS, quality=VARIANT_QUALITY):
+    img = Image.open(BytesIO(image_bytes))
+    # Para JPEG, decodifica direto numa escala reduzida (bem mais rápido para fotos grandes).
+    # Os dois lados ficam >= à maior largura, pois a orientação EXIF pode trocar largura e altura.
+    largest = max(variants.values())
+    img.draft("RGB", (largest, largest))
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+
+    results = {}
+    for variant, width in sorted(variants.items(), key=lambda item: -item[1]):
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        buffer = BytesIO()
+        img.save(buffer, format=VARIANT_FORMAT, quality=quality, method=4)
+        results[variant] = buffer.getvalue()
+    return results
+
+
+def _has_alpha(img):
+    return img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+
+
+def _target_format(img):
+    return ("webp", "image/webp") if _has_alpha(img) else ("jpg", "image/jpeg")
+
+
+# Se a imagem precisa de mais que uma nova compressão: reduzir, converter as cores ou tirar
+# metadados (a orientação EXIF está nos metadados)
+def _needs_changes(img, max_side):
+    return max(img.size) > max_side or img.mode not in KEEP_MODES or bool(METADATA_KEYS & img.info.keys())
+
+
+# Formato da imagem normalizada (extensão, content-type). Fotos viram JPEG e imagens com
+# transparência viram WebP, o que sai só do cabeçalho; uma PNG (ou WebP sem transparência)
+# que não precisa de mudanças fica no formato em que for menor, e aí é preciso comprimir.
+def normalized_format(image_bytes, max_side=NORMALIZE_MAX_SIDE, quality=NORMALIZE_QUALITY):
+    img = Image.open(BytesIO(image_bytes))
+    target = _target_format(img)
+    kept = KEEP_FORMATS.get(img.format)
+    if kept is None or kept == target or _needs_changes(img, max_side):
+        return target
+    return _smaller(image_bytes, max_side, quality)[0]
+
+
+# Modos cujo perfil ICC continua válido depois da conversão para RGB/RGBA
+RGB_MODES = {"RGB", "RGBA", "RGBX", "P", "PA"}
+
+
+# Converte para RGB/RGBA e devolve o perfil ICC que ainda vale para os pixels convertidos.
+# Em outros espaços de cor (CMYK, por exemplo) o perfil original descreveria cores erradas:
+# a conversão passa pelo perfil até sRGB e o resultado sai sem perfil (sRGB implícito).
+def _to_rgb(img, mode, icc_profile):
+    if img.mode in RGB_MODES:
+        return img.convert(mode), icc_profile
+    if icc_profile and img.mode == "CMYK":
+        try:
+            source = ImageCms.ImageCmsProfile(BytesIO(icc_profile))
+            img = ImageCms.profileToProfile(img, source, ImageCms.createProfile("sRGB"), outputMode="RGB")
+        except ImageCms.PyCMSError:
+            pass
+    return img.convert(mode), None
+
+
+def _encode(img, max_side, quality):
+    alpha = _has_alpha(img)
+    icc_profile = img.info.get("icc_profile")
+    img.draft("RGB", (max_side, max_side))
+    img = ImageOps.exif_transpose(img)
+    if max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    img, icc_profile = _to_rgb(img, "RGBA" if alpha else "RGB", icc_profile)
+    buffer = BytesIO()
+    extra = {"icc_profile": icc_profile} if icc_profile else {}
+    if alpha:
+        img.save(buffer, format="webp", quality=quality, method=4, **extra)
+    else:
+        img.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True, **extra)
+    return buffer.getvalue()
+
+
+# ((extensão, content-type), bytes) do menor entre o original e a versão comprimida, para
+# imagens sem mudanças necessárias. Em cache porque normalized_format e normalize_image
+# são chamados em seguida com os mesmos bytes.
+@lru_cache(maxsize=4)
+def _smaller(image_bytes, max_side, quality):
+    img = Image.open(BytesIO(image_bytes))
+    encoded = _encode(img, max_side, quality)
+    if len(encoded) < len(image_bytes):
+        return _target_format(img), encoded
+    return KEEP_FORMATS[img.format], image_bytes
+
+
+def normalize_image(image_bytes, max_side=NORMALIZE_MAX_SIDE, quality=NORMALIZE_QUALITY):
+    img = Image.open(BytesIO(image_bytes))
+    kept = KEEP_FORMATS.get(img.format)
+    if kept is not None and not _needs_changes(img, max_side):
+        # Já no formato final: fica como veio, sem perder qualidade numa nova compressão
+        if kept == _target_format(img):
+            return image_bytes
+        return _smaller(image_bytes, max_side, quality)[1]
+    return _encode(img, max_side, quality)
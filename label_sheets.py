@@ -0,0 +1,217 @@
+import zipfile
+import zlib
+from itertools import islice
+
+from qrcode.constants import ERROR_CORRECT_M
+
+from qr_render import choose_code, dark_runs, render_matrix
+
+
+# Folhas de etiquetas com QR Code, nome, valor e ID, em PDF (várias páginas) ou SVG (um por página).
+#
+# Os QR Codes são desenhados como vetor: cada sequência horizontal de módulos escuros vira um
+# retângulo, e todos os retângulos da página são preenchidos com uma única operação. Não há
+# imagem PIL por código. As páginas são escritas na saída assim que ficam prontas; só a página
+# atual fica em memória, então tiragens grandes não crescem em memória.
+# O PDF é escrito à mão (sem dependências), com as fontes padrão Helvetica.
+
+MM = 72 / 25.4
+
+# Zona de silêncio em volta do QR Code, em módulos (o padrão pede 4; a margem da etiqueta completa)
+QUIET_ZONE = 2
+
+PAGE_FORMATS = {
+    "A4": (210.0, 297.0),
+    "Carta": (215.9, 279.4),
+}
+
+# Modelos de folha: formato, colunas x linhas, tamanho da etiqueta e espaçamento (mm).
+# As margens são calculadas para centralizar a grade na folha.
+TEMPLATES = {
+    "A4 — 3 x 8 (70 x 37 mm)": {"page": "A4", "cols": 3, "rows": 8, "label": (70.0, 37.0), "gap": (0.0, 0.0)},
+    "A4 — 2 x 7 (99,1 x 38,1 mm)": {"page": "A4", "cols": 2, "rows": 7, "label": (99.1, 38.1), "gap": (2.5, 0.0)},
+    "A4 — 4 x 10 (48,5 x 25,4 mm)": {"page": "A4", "cols": 4, "rows": 10, "label": (48.5, 25.4), "gap": (0.0, 0.0)},
+    "A4 — 2 x 4 (99,1 x 67,7 mm)": {"page": "A4", "cols": 2, "rows": 4, "label": (99.1, 67.7), "gap": (2.5, 0.0)},
+    "Carta — 3 x 10 (66,7 x 25,4 mm)": {"page": "Carta", "cols": 3, "rows": 10, "label": (66.7, 25.4),
+                                       "gap": (3.2, 0.0)},
+}
+
+
+def _layout(template):
+    page_w, page_h = PAGE_FORMATS[template["page"]]
+    label_w, label_h = template["label"]
+    gap_x, gap_y = template["gap"]
+    cols, rows = template["cols"], template["rows"]
+    margin_x = (page_w - cols * label_w - (cols - 1) * gap_x) / 2
+    margin_y = (page_h - rows * label_h - (rows - 1) * gap_y) / 2
+    # Canto superior esquerdo de cada etiqueta, em mm a partir do topo da folha
+    slots = [(margin_x + c * (label_w + gap_x), margin_y + r * (label_h + gap_y))
+             for r in range(rows) for c in range(cols)]
+    return (page_w, page_h), (label_w, label_h), slots
+
+
+def _label_parts(label, label_size, error_correction):
+    # Geometria comum ao PDF e ao SVG: QR Code quadrado à esquerda, textos à direita (mm)
+    label_w, label_h = label_size
+    pad = min(3.0, label_h * 0.08)
+    qr_size = min(label_h - 2 * pad, label_w * 0.5)
+    # Versão e correção escolhidas para o tamanho real do código na etiqueta
+    version, error_correction = choose_code(label["id"], qr_size, error_correction, border=QUIET_ZONE)
+    matrix = render_matrix(str(label["id"]), version, error_correction)
+    module = qr_size / (len(matrix) + 2 * QUIET_ZONE)
+    text_x = pad + qr_size + pad
+    text_w = label_w - text_x - pad
+
+    name_size = max(2.6, min(4.2, label_h * 0.13))
+    small_size = name_size * 0.8
+    lines = [(True, name_size, label.get("name") or "")]
+    if label.get("price") is not None:
+        lines.append((False, small_size, f"R$ {float(label['price']):.2f}"))
+    lines.append((False, small_size, f"ID: {label['id']}"))
+
+    texts = []
+    y = pad + name_size
+    for bold, size, text in lines:
+        texts.append((bold, size, text_x, y, _fit(text, text_w, size)))
+        y += size * 1.35
+    return matrix, (pad + QUIET_ZONE * module, (label_h - qr_size) / 2 + QUIET_ZONE * module), module, texts
+
+
+def _fit(text, width, size):
+    # Largura média da Helvetica ~0,55 do tamanho da fonte; corta com reticências
+    max_chars = max(4, int(width / (size * 0.55)))
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def _pages(labels, template):
+    per_page = template["cols"] * template["rows"]
+    labels = iter(labels)
+    while True:
+        page = list(islice(labels, per_page))
+        if not page:
+            return
+        yield page
+
+
+# PDF
+
+def _pdf_text(text):
+    data = text.encode("cp1252", "replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class PdfLabelWriter:
+    def __init__(self, out, template, error_correction=ERROR_CORRECT_M):
+        self.out = out
+        self.template = template
+        self.error_correction = error_correction
+        self.page_size, self.label_size, self.slots = _layout(template)
+        self._offsets = {}
+        self._page_ids = []
+        self._position = 0
+        self._next_id = 5  # 1: catálogo, 2: árvore de páginas, 3 e 4: fontes
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data):
+        self.out.write(data)
+        self._position += len(data)
+
+    def _object(self, number, body):
+        self._offsets[number] = self._position
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def _content(self, labels):
+        page_h = self.page_size[1]
+        rects = []
+        texts = []
+        for label, (left, top) in zip(labels, self.slots):
+            matrix, (qr_x, qr_y), module, label_texts = _label_parts(label, self.label_size, self.error_correction)
+            # PDF tem origem no canto inferior esquerdo
+            base_x = (left + qr_x) * MM
+            base_y = (page_h - top - qr_y) * MM
+            m = module * MM
+            for row, col, length in dark_runs(matrix):
+                rects.append(b"%.2f %.2f %.2f %.2f re" % (base_x + col * m, base_y - (row + 1) * m, length * m, m))
+            for bold, size, x, y, text in label_texts:
+                texts.append(b"BT /%s %.2f Tf %.2f %.2f Td (%s) Tj ET" % (
+                    b"F2" if bold else b"F1", size * MM, (left + x) * MM, (page_h - top - y) * MM, _pdf_text(text)))
+        # Todos os módulos da página preenchidos de uma vez
+        return b"0 g\n" + b"\n".join(rects) + b"\nf\n" + b"\n".join(texts)
+
+    def add_page(self, labels):
+        content = zlib.compress(self._content(labels))
+        content_id, page_id = self._next_id, self._next_id + 1
+        self._next_id += 2
+        self._object(content_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content)
+                     + content + b"\nendstream")
+        width, height = (v * MM for v in self.page_size)
+        self._object(page_id, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+                              b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+                     % (width, height, content_id))
+        self._page_ids.append(page_id)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_ids)))
+        xref_position = self._position
+        size = self._next_id
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for number in range(1, size):
+            self._write(b"%010d 00000 n \n" % self._offsets[number])
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_position))
+        return len(self._page_ids)
+
+
+# labels: iterável de dicionários com "id", "name" e, opcionalmente, "price".
+# Devolve a quantidade de páginas escritas em out (arquivo binário).
+def write_pdf(labels, out, template, error_correction=ERROR_CORRECT_M):
+    writer = PdfLabelWriter(out, template, error_correction)
+    for page in _pages(labels, template):
+        writer.add_page(page)
+    return writer.close()
+
+
+# SVG
+
+def _svg_escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _svg_page(labels, template, error_correction):
+    (page_w, page_h), label_size, slots = _layout(template)
+    path = []
+    texts = []
+    for label, (left, top) in zip(labels, slots):
+        matrix, (qr_x, qr_y), module, label_texts = _label_parts(label, label_size, error_correction)
+        for row, col, length in dark_runs(matrix):
+            path.append(f"M{left + qr_x + col * module:.3f} {top + qr_y + row * module:.3f}"
+                        f"h{length * module:.3f}v{module:.3f}h{-length * module:.3f}z")
+        for bold, size, x, y, text in label_texts:
+            weight = ' font-weight="bold"' if bold else ""
+            texts.append(f'<text x="{left + x:.2f}" y="{top + y:.2f}" font-size="{size:.2f}"{weight}>'
+                         f'{_svg_escape(text)}</text>')
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{page_w}mm" height="{page_h}mm" '
+        f'viewBox="0 0 {page_w} {page_h}">'
+        f'<rect width="100%" height="100%" fill="white"/>'
+        f'<path fill="black" shape-rendering="crispEdges" d="{"".join(path)}"/>'
+        f'<g font-family="Helvetica, Arial, sans-serif" fill="black">{"".join(texts)}</g></svg>'
+    )
+
+
+# Gera o SVG de cada página, sob demanda
+def iter_svg_pages(labels, template, error_correction=ERROR_CORRECT_M):
+    for page in _pages(labels, template):
+        yield _svg_page(page, template, error_correction)
+
+
+# Um SVG por página dentro de um ZIP; devolve a quantidade de páginas
+def write_svg_zip(labels, out, template, error_correction=ERROR_CORRECT_M):
+    pages = 0
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        for pages, svg in enumerate(iter_svg_pages(labels, template, error_correction), start=1):
+            archive.writestr(f"etiquetas_{pages:04d}.svg", svg)
+    return pages
@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+
+# Métricas de tempo por etapa (leitura, cadastro, listagem, chamadas ao Supabase e ao SQLite).
+# Cada span alimenta um histograma com buckets fixos: registrar uma medida custa um
+# perf_counter, um bisect e um lock, então a instrumentação pode ficar ligada em produção.
+# Exportação em formato texto do Prometheus (HTTP /metrics) e/ou em arquivo JSON lines rotativo,
+# configurada pelas variáveis de ambiente METRICS_PORT e METRICS_JSONL_PATH.
+
+METRIC_NAME = "qrcode_app_stage_seconds"
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self, name=METRIC_NAME, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, **labels):
+        key = (stage, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    def timed(self, stage, **labels):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self._lock:
+            return [{
+                "stage": stage,
+                "labels": dict(labels),
+                "count": histogram.count,
+                "sum": histogram.sum,
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], histogram.counts)),
+            } for (stage, labels), histogram in sorted(self._histograms.items())]
+
+    def prometheus_text(self):
+        lines = [
+            f"# HELP {self.name} Duração de cada etapa da aplicação, em segundos.",
+            f"# TYPE {self.name} histogram",
+        ]
+        for metric in self.snapshot():
+            labels = {"stage": metric["stage"], **metric["labels"]}
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            cumulative = 0
+            for bound, count in metric["buckets"].items():
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {metric['sum']}")
+            lines.append(f"{self.name}_count{{{base}}} {metric['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+span = registry.span
+timed = registry.timed
+observe = registry.observe
+
+
+# Exportadores
+
+def start_http_exporter(port, host="0.0.0.0", metrics=registry):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_jsonl_exporter(path, interval=60, max_bytes=10 * 1024 * 1024, backups=5, metrics=registry):
+    logger = logging.getLogger(f"metrics.jsonl.{path}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            logger.info(json.dumps({"timestamp": time.time(), "metrics": metrics.snapshot()}))
+
+    threading.Thread(target=loop, name="metrics-jsonl", daemon=True).start()
+    return handler
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+# Idempotente: pode ser chamada a cada rerun do Streamlit
+def start_exporters_from_env():
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if os.environ.get("METRICS_PORT"):
+            start_http_exporter(int(os.environ["METRICS_PORT"]))
+        if os.environ.get("METRICS_JSONL_PATH"):
+            start_jsonl_exporter(
+                os.environ["METRICS_JSONL_PATH"],
+                interval=float(os.environ.get("METRICS_JSONL_INTERVAL", 60))
+            )
+
+
+# Cliente Supabase instrumentado: cada execute() de tabela/RPC e cada chamada ao storage
+# vira um span "supabase" com a operação como label.
+
+_QUERY_ACTIONS = ("select", "insert", "update", "upsert", "delete")
+
+
+class _TimedQuery:
+    def __init__(self, builder, op):
+        self._builder = builder
+        self._op = op
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+        if name == "execute":
+            def execute(*args, **kwargs):
+                with span("supabase", op=self._op):
+                    return attr(*args, **kwargs)
+            return execute
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _TimedQuery(result, f"{self._op}.{name}" if name in _QUERY_ACTIONS else self._op)
+            return result
+        return call
+
+
+class _TimedBucket:
+    _TIMED = ("upload", "download", "exists", "remove", "list", "update", "move", "copy")
+
+    def __init__(self, bucket):
+        self._bucket = bucket
+
+    def __getattr__(self, name):
+        attr = getattr(self._bucket, name)
+        if name not in self._TIMED:
+            return attr
+
+        def call(*args, **kwargs):
+            with span("supabase", op=f"storage.{name}"):
+                return attr(*args, **kwargs)
+        return call
+
+
+class _TimedStorage:
+    def __init__(self, storage):
+        self._storage = storage
+
+    def from_(self, bucket_name):
+        return _TimedBucket(self._storage.from_(bucket_name))
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+
+class InstrumentedSupabase:
+    def __init__(self, client):
+        self._client = client
+        self.storage = _TimedStorage(client.storage)
+
+    def table(self, name):
+        return _TimedQuery(self._client.table(name), f"table.{name}")
+
+    def rpc(self, name, params=None):
+        return _TimedQuery(self._client.rpc(name, params or {}), f"rpc.{name}")
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Cache de produtos por ID com expiração (TTL), compartilhado entre sessões.
+# IDs inexistentes também ficam em cache (cache negativo), por um tempo menor,
+# para que leituras repetidas de QR Codes desconhecidos não consultem o banco toda vez.
+class ProductCache:
+    def __init__(self, max_entries=2048, ttl=300, negative_ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Geração de cada ID invalidado e do cache inteiro: quem buscou no banco antes de uma
+        # invalidação não grava o valor antigo depois dela (ver set)
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    # Devolve (encontrado, produto); produto é None quando o ID está no cache negativo
+    def get(self, product_id):
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[product_id]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(product_id)
+            self.hits += 1
+            return True, entry[1]
+
+    # Capturada antes de buscar o produto no banco e passada para set
+    def generation(self, product_id):
+        with self._lock:
+            return self._epoch, self._generations.get(product_id, 0)
+
+    def set(self, product_id, product, generation=None):
+        ttl = self.ttl if product is not None else self.negative_ttl
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(product_id, 0)):
+                return
+            self._entries[product_id] = (time.monotonic() + ttl, product)
+            self._entries.move_to_end(product_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, product_id):
+        with self._lock:
+            self._entries.pop(product_id, None)
+            self._generations[product_id] = self._generations.get(product_id, 0) + 1
+            if len(self._generations) > self.max_entries:
+                # Trocar a época também invalida as gerações esquecidas
+                self._generations.clear()
+                self._epoch += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,77 @@
+from abc import ABC, abstractmethod
+
+from product_cache import ProductCache
+
+
+# Busca de produtos por ID, com o cache em memória na frente do banco.
+# Usada pelos apps Streamlit e pelo serviço HTTP de leitura (scan_service.py),
+# para que os dois sigam exatamente a mesma lógica.
+class _CachedLookup(ABC):
+    def __init__(self, cache=None, chunk_size=200):
+        self.cache = cache or ProductCache()
+        self.chunk_size = chunk_size
+
+    # Busca no banco os produtos dos IDs; devolve {id: produto} só com os encontrados
+    @abstractmethod
+    def _fetch(self, product_ids):
+        ...
+
+    def get(self, product_id):
+        # Produtos lidos recentemente (ou sabidamente inexistentes) vêm do cache em memória
+        found, product = self.cache.get(product_id)
+        if found:
+            return product
+        generation = self.cache.generation(product_id)
+        product = self._fetch([product_id]).get(product_id)
+        self.cache.set(product_id, product, generation)
+        return product
+
+    # Busca vários produtos de uma vez, em vez de uma consulta por ID; só vai ao banco o que não está em cache
+    def get_many(self, product_ids):
+        products = {}
+        missing = []
+        for product_id in product_ids:
+            found, product = self.cache.get(product_id)
+            if not found:
+                missing.append(product_id)
+            elif product is not None:
+                products[product_id] = product
+
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = missing[start:start + self.chunk_size]
+            generations = [self.cache.generation(product_id) for product_id in chunk]
+            fetched = self._fetch(chunk)
+            for product_id, generation in zip(chunk, generations):
+                self.cache.set(product_id, fetched.get(product_id), generation)
+            products.update(fetched)
+        return products
+
+
+class SupabaseProductLookup(_CachedLookup):
+    def __init__(self, client, cache=None, chunk_size=200):
+        super().__init__(cache, chunk_size)
+        self.client = client
+
+    def _fetch(self, product_ids):
+        query = self.client.table('products').select("*")
+        if len(product_ids) == 1:
+            query = query.eq("id", product_ids[0])
+        else:
+            query = query.in_("id", product_ids)
+        return {p['id']: p for p in query.execute().data}
+
+
+# Linhas do SQLite são tuplas (id, name, description, creation_date, image_path)
+class SQLiteProductLookup(_CachedLookup):
+    def __init__(self, pool, cache=None, chunk_size=500):
+        super().__init__(cache, chunk_size)
+        self.pool = pool
+
+    def _fetch(self, product_ids):
+        with self.pool.connection() as conn:
+            if len(product_ids) == 1:
+                cursor = conn.execute("SELECT * FROM products WHERE id=?", product_ids)
+            else:
+                placeholders = ", ".join("?" * len(product_ids))
+                cursor = conn.execute(f"SELECT * FROM products WHERE id IN ({placeholders})", product_ids)
+            return {row[0]: row for row in cursor.fetchall()}
@@ -0,0 +1,126 @@
+import re
+
+
+# Busca textual por nome e descrição, com resultados ordenados por relevância e paginados.
+# Cada termo digitado casa por prefixo ("cami" encontra "camiseta") e todos precisam aparecer.
+# As páginas usam o deslocamento no ranking como cursor, no mesmo formato (linhas, próximo
+# cursor) da listagem por keyset, então a navegação da listagem serve para as duas.
+
+_TERMS = re.compile(r"\w+")
+
+
+def search_terms(text):
+    return _TERMS.findall(text.lower())
+
+
+# Consulta FTS5: cada termo entre aspas (sem sintaxe de operadores) e com * para prefixo
+def fts5_query(text):
+    return " ".join(f'"{term}"*' for term in search_terms(text))
+
+
+def _page(rows, offset, page_size):
+    if len(rows) > page_size:
+        return rows[:page_size], offset + page_size
+    return rows, None
+
+
+# Supabase: função search_products (sql/005_products_search.sql), que usa o índice GIN do
+# tsvector e o de trigramas do nome; só a página pedida volta do servidor
+class SupabaseProductSearch:
+    def __init__(self, client):
+        self.client = client
+
+    def page(self, text, offset=0, page_size=20, category=None):
+        params = {"p_query": text, "p_limit": page_size + 1, "p_offset": offset}
+        if category:
+            params["p_category"] = category
+        rows = self.client.rpc("search_products", params).execute().data
+        return _page(rows, offset, page_size)
+
+
+# Índice FTS5 mantido pelos triggers da tabela products. O rowid de products não serve de chave
+# (a tabela tem id TEXT PRIMARY KEY, e o VACUUM pode renumerar o rowid), então cada produto
+# recebe uma chave inteira estável em products_fts_keys, usada como rowid no índice. O índice
+# guarda o próprio texto e, sem indexar, id e creation_date: o ranking, o desempate e a
+# página saem só dele, e da tabela vêm só as linhas da página.
+FTS_OBJECTS = ("products_fts_keys", "products_fts", "products_fts_insert", "products_fts_delete",
+               "products_fts_update")
+
+FTS_SCHEMA = (
+    "CREATE TABLE products_fts_keys (key INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE)",
+    """CREATE VIRTUAL TABLE products_fts
+       USING fts5(name, description, id UNINDEXED, creation_date UNINDEXED,
+                  tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+           INSERT INTO products_fts_keys(id) VALUES (new.id);
+           INSERT INTO products_fts(rowid, name, description, id, creation_date)
+           VALUES (last_insert_rowid(), new.name, new.description, new.id, new.creation_date);
+       END""",
+    """CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+           DELETE FROM products_fts WHERE rowid = (SELECT key FROM products_fts_keys WHERE id = old.id);
+           DELETE FROM products_fts_keys WHERE id = old.id;
+       END""",
+    """CREATE TRIGGER products_fts_update AFTER UPDATE ON products BEGIN
+           UPDATE products_fts SET name = new.name, description = new.description, id = new.id,
+                                   creation_date = new.creation_date
+           WHERE rowid = (SELECT key FROM products_fts_keys WHERE id = old.id);
+           UPDATE products_fts_keys SET id = new.id WHERE id = old.id;
+       END""",
+    # Preenche o índice com os produtos existentes
+    "INSERT INTO products_fts_keys(id) SELECT id FROM products",
+    """INSERT INTO products_fts(rowid, name, description, id, creation_date)
+       SELECT key, name, description, id, creation_date FROM products_fts_keys JOIN products USING (id)""",
+)
+
+
+def _fts_ready(conn):
+    placeholders = ", ".join("?" * len(FTS_OBJECTS))
+    found = dict(conn.execute(f"SELECT name, sql FROM sqlite_master WHERE name IN ({placeholders})",
+                              FTS_OBJECTS).fetchall())
+    # A versão anterior do índice era de conteúdo externo, ligada ao rowid de products
+    return len(found) == len(FTS_OBJECTS) and "content_rowid" not in found["products_fts"]
+
+
+# Cria o índice quando ele não existe (ou ainda é da versão anterior); se já estiver pronto,
+# só lê o sqlite_master, sem abrir transação de escrita
+def ensure_fts(conn):
+    if _fts_ready(conn):
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Outro processo pode ter criado o índice enquanto este esperava o lock
+        if not _fts_ready(conn):
+            for name in ("products_fts_insert", "products_fts_delete", "products_fts_update"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute("DROP TABLE IF EXISTS products_fts")
+            conn.execute("DROP TABLE IF EXISTS products_fts_keys")
+            for statement in FTS_SCHEMA:
+                conn.execute(statement)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+# Linhas do SQLite são tuplas (id, name, description, creation_date, image_path)
+class SQLiteProductSearch:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def page(self, text, offset=0, page_size=20):
+        query = fts5_query(text)
+        if not query:
+            return [], None
+        with self.pool.connection() as conn:
+            # bm25 com peso 10 para o nome e 1 para a descrição; nos empates, a mesma ordem da
+            # listagem (mais recentes primeiro)
+            rows = conn.execute("""SELECT products.* FROM
+                                       (SELECT id, creation_date, bm25(products_fts, 10.0, 1.0) AS score
+                                        FROM products_fts
+                                        WHERE products_fts MATCH ?
+                                        ORDER BY score, creation_date DESC, id DESC
+                                        LIMIT ? OFFSET ?) AS hits
+                                   JOIN products ON products.id = hits.id
+                                   ORDER BY hits.score, hits.creation_date DESC, hits.id DESC""",
+                                (query, page_size + 1, offset)).fetchall()
+        return _page(rows, offset, page_size)
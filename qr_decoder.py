@@ -0,0 +1,69 @@
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+from pyzbar.pyzbar import decode as pyzbar_decode, ZBarSymbol
+
+from metrics import span
+
+
+# Motor de decodificação de QR Code compartilhado pelos apps.
+# Primeiro tenta o pyzbar e, se ele não encontrar nada, usa o detector do OpenCV.
+class QRDecoder:
+    def __init__(self):
+        # cv2.QRCodeDetector não é thread-safe: cada thread mantém a sua instância já criada
+        self._local = threading.local()
+
+    def _detector(self):
+        detector = getattr(self._local, "detector", None)
+        if detector is None:
+            detector = self._local.detector = cv2.QRCodeDetector()
+        return detector
+
+    def decode(self, image):
+        return [data for data, _ in self.decode_regions(image)]
+
+    # Como decode(), mas com a região (x, y, largura, altura) de cada QR Code na imagem
+    def decode_regions(self, image):
+        # Converter para array numpy uint8
+        if image.dtype == bool:
+            image = image.astype(np.uint8) * 255
+
+        # Converter para escala de cinza se necessário
+        if len(image.shape) == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+        with span("decode.pyzbar"):
+            decoded_objects = pyzbar_decode(image, symbols=[ZBarSymbol.QRCODE])
+        if decoded_objects:
+            return [(obj.data.decode('utf-8'), tuple(obj.rect)) for obj in decoded_objects]
+
+        with span("decode.opencv"):
+            data, points, _ = self._detector().detectAndDecode(image)
+        if not data:
+            return []
+        return [(data, cv2.boundingRect(points.reshape(-1, 2).astype(np.float32)))]
+
+    def decode_first(self, image):
+        results = self.decode(image)
+        return results[0] if results else None
+
+
+def load_grayscale(image_file):
+    with span("scan.load_image"):
+        return np.array(Image.open(image_file).convert('L'))
+
+
+_decoder = None
+_decoder_lock = threading.Lock()
+
+
+# Instância única por processo, para uso fora do Streamlit
+def get_decoder():
+    global _decoder
+    if _decoder is None:
+        with _decoder_lock:
+            if _decoder is None:
+                _decoder = QRDecoder()
+    return _decoder
@@ -0,0 +1,254 @@
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import qrcode
+from PIL import Image
+from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q
+
+
+# Cache LRU limitado de QR Codes já renderizados, por quantidade de entradas e por bytes
+# (PNG, SVG e arrays de exibição têm tamanhos muito diferentes).
+# Fica no nível do módulo (um por processo), então sobrevive aos reruns do Streamlit
+# e é compartilhado por todas as sessões. As entradas não mudam depois do put.
+class QRRenderCache:
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, entry):
+        size = _entry_size(entry)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            # Uma entrada maior que o limite inteiro não é guardada
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (entry, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._bytes -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Tamanho aproximado de uma entrada: bytes dos PNG/SVG e dos arrays
+def _entry_size(entry):
+    if isinstance(entry, dict):
+        return sum(_entry_size(value) for value in entry.values())
+    if isinstance(entry, np.ndarray):
+        return entry.nbytes
+    if isinstance(entry, (bytes, str)):
+        return len(entry)
+    return 0
+
+
+_cache = QRRenderCache()
+
+
+def _render(payload, version, error_correction, box_size, border):
+    qr = qrcode.QRCode(
+        version=version,
+        error_correction=error_correction,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr.make_image(fill_color="black", back_color="white")
+
+
+def _get_entry(payload, version, error_correction, box_size, border):
+    key = (str(payload), version, error_correction, box_size, border)
+    entry = _cache.get(key)
+    if entry is None:
+        img = _render(str(payload), version, error_correction, box_size, border)
+        img_buffer = BytesIO()
+        img.save(img_buffer, format="PNG")
+
+        # Array RGB somente leitura, pronto para st.image
+        array = np.array(img.convert("RGB"))
+        array.flags.writeable = False
+
+        entry = {"png": img_buffer.getvalue(), "array": array}
+        _cache.put(key, entry)
+    return entry
+
+
+# Os valores padrão são os mesmos de qrcode.make
+def render_png(payload, version=None, error_correction=ERROR_CORRECT_M, box_size=10, border=4):
+    return _get_entry(payload, version, error_correction, box_size, border)["png"]
+
+
+def render_array(payload, version=None, error_correction=ERROR_CORRECT_M, box_size=10, border=4):
+    return _get_entry(payload, version, error_correction, box_size, border)["array"]
+
+
+# Matriz de módulos (True = escuro), sem a margem, para desenhar o QR Code em lote
+# como vetor (PDF/SVG) em vez de gerar uma imagem PIL por código
+def render_matrix(payload, version=None, error_correction=ERROR_CORRECT_M):
+    qr = qrcode.QRCode(version=version, error_correction=error_correction, border=0)
+    qr.add_data(str(payload))
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+# (linha, coluna inicial, comprimento) de cada sequência horizontal de módulos escuros,
+# para desenhar o QR Code como vetor com um retângulo por sequência
+def dark_runs(matrix):
+    for y, row in enumerate(matrix):
+        x = 0
+        size = len(row)
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                yield y, start, x - start
+            else:
+                x += 1
+
+
+# Menor módulo que uma câmera de celular lê com folga no papel (mm)
+MIN_MODULE_MM = 0.5
+
+# Perfis de exportação do QR Code:
+#   print_mm: lado do código impresso (com a margem), limita o tamanho da versão
+#   error_correction: nível mínimo de correção de erros desejado
+#   box_size: pixels por módulo do PNG; a tela amplia na exibição (render_profile_array)
+# O PNG é de 1 bit por pixel e otimizado; o SVG tem o tamanho físico de print_mm.
+QR_PROFILES = {
+    # Gravado no storage e baixado pelo usuário
+    "storage": {"print_mm": 25, "error_correction": ERROR_CORRECT_M, "box_size": 8, "border": 4},
+    # Impressão maior, com alta correção de erros
+    "print": {"print_mm": 40, "error_correction": ERROR_CORRECT_H, "box_size": 10, "border": 4},
+}
+
+DEFAULT_QR_PROFILE = "storage"
+
+# Níveis de correção de erros em ordem crescente (as constantes do qrcode não são ordenadas)
+_LEVELS = [ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q, ERROR_CORRECT_H]
+
+
+def _min_version(payload, error_correction):
+    qr = qrcode.QRCode(error_correction=error_correction)
+    qr.add_data(str(payload))
+    return qr.best_fit()
+
+
+# Menor versão que comporta o payload no nível pedido. Se os módulos ficarem menores que
+# min_module_mm no tamanho impresso, reduz a correção até caber; depois sobe a correção
+# enquanto a versão não muda (mais robustez sem aumentar o código).
+def choose_code(payload, print_mm, error_correction=ERROR_CORRECT_M, border=4, min_module_mm=MIN_MODULE_MM):
+    def fits(version):
+        return print_mm / (version * 4 + 17 + 2 * border) >= min_module_mm
+
+    level = _LEVELS.index(error_correction)
+    version = _min_version(payload, _LEVELS[level])
+    while level > 0 and not fits(version):
+        level -= 1
+        version = _min_version(payload, _LEVELS[level])
+    while level < len(_LEVELS) - 1 and _min_version(payload, _LEVELS[level + 1]) == version:
+        level += 1
+    return version, _LEVELS[level]
+
+
+def _get_profile_entry(payload, profile):
+    key = ("profile", str(payload), profile)
+    entry = _cache.get(key)
+    if entry is None:
+        params = QR_PROFILES[profile]
+        version, error_correction = choose_code(payload, params["print_mm"], params["error_correction"],
+                                                params["border"])
+        matrix = np.pad(np.array(render_matrix(payload, version, error_correction), dtype=bool), params["border"])
+        matrix.flags.writeable = False
+        entry = {"matrix": matrix, "version": version, "error_correction": error_correction}
+        _cache.put(key, entry)
+    return entry
+
+
+# Cada artefato do perfil fica na sua própria entrada do cache, com o tamanho contado no put
+def _cached(key, render):
+    value = _cache.get(key)
+    if value is None:
+        value = render()
+        _cache.put(key, value)
+    return value
+
+
+# PNG de 1 bit por pixel no tamanho do perfil (fundo branco, módulos pretos)
+def render_profile_png(payload, profile=DEFAULT_QR_PROFILE):
+    def render():
+        box_size = QR_PROFILES[profile]["box_size"]
+        matrix = _get_profile_entry(payload, profile)["matrix"]
+        pixels = np.repeat(np.repeat(~matrix, box_size, axis=0), box_size, axis=1)
+        buffer = BytesIO()
+        Image.fromarray(pixels).save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+    return _cached(("profile_png", str(payload), profile), render)
+
+
+# SVG com um único path, no tamanho físico do perfil
+def render_profile_svg(payload, profile=DEFAULT_QR_PROFILE):
+    def render():
+        matrix = _get_profile_entry(payload, profile)["matrix"]
+        size = matrix.shape[0]
+        print_mm = QR_PROFILES[profile]["print_mm"]
+        path = "".join(f"M{x} {y}h{length}v1h-{length}z" for y, x, length in dark_runs(matrix))
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{print_mm}mm" height="{print_mm}mm" '
+            f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+            f'<rect width="{size}" height="{size}" fill="white"/><path fill="black" d="{path}"/></svg>'
+        ).encode("utf-8")
+    return _cached(("profile_svg", str(payload), profile), render)
+
+
+# Matriz em tons de cinza ampliada só para exibição (vizinho mais próximo, sem borrar os módulos)
+def render_profile_array(payload, profile=DEFAULT_QR_PROFILE, scale=10):
+    def render():
+        matrix = _get_profile_entry(payload, profile)["matrix"]
+        pixels = np.repeat(np.repeat(~matrix, scale, axis=0), scale, axis=1).astype(np.uint8) * 255
+        pixels.flags.writeable = False
+        return pixels
+    return _cached(("profile_array", str(payload), profile, scale), render)
+
+
+def cache_info():
+    return _cache.info()
+
+
+def clear_cache():
+    _cache.clear()
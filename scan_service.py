@@ -0,0 +1,226 @@
+# Serviço HTTP de leitura de QR Code e consulta de produtos, sem Streamlit.
+#
+# Para leitores portáteis e a integração com o PDV: o processo sobe uma vez, mantém o
+# decodificador, o pool de processos do lote e o cache de produtos aquecidos, e atende
+# cada requisição numa thread, sem reexecutar script nenhum.
+#
+#   POST /scan             corpo: bytes da imagem        -> {"code": ..., "product": {...}}
+#   POST /scan/batch       corpo: ZIP com imagens        -> {"results": [{"name", "codes", "products", "error"}]}
+#   GET  /products/<id>                                  -> {...}
+#   GET  /metrics          métricas no formato do Prometheus (ver metrics.py)
+#
+# Uso:
+#   python scan_service.py --backend sqlite --db products.db
+#   SUPABASE_URL=... SUPABASE_KEY=... python scan_service.py --backend supabase --numeric-ids
+#   (--numeric-ids para a base do app.py, em que os IDs são inteiros por categoria)
+import argparse
+import json
+import os
+import zipfile
+from io import BytesIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from batch_scan import BatchScanner, IMAGE_EXTENSIONS
+from metrics import InstrumentedSupabase, registry, span
+from product_cache import ProductCache
+from product_lookup import SQLiteProductLookup, SupabaseProductLookup
+from qr_decoder import get_decoder, load_grayscale
+
+
+# Colunas da tabela do app_init.py (as linhas do SQLite são tuplas)
+SQLITE_COLUMNS = ("id", "name", "description", "creation_date", "image_path")
+
+# Tamanho máximo do corpo das requisições
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+
+class ScanService:
+    def __init__(self, lookup, numeric_ids=False, batch_scanner=None):
+        self.lookup = lookup
+        self.numeric_ids = numeric_ids
+        self.batch_scanner = batch_scanner
+        self.decoder = get_decoder()
+
+    # Converte o conteúdo do QR Code no tipo de ID da base; None se não for um ID válido
+    def parse_id(self, code):
+        code = code.strip()
+        if not self.numeric_ids:
+            return code
+        try:
+            return int(code)
+        except ValueError:
+            return None
+
+    def to_json(self, product):
+        if isinstance(product, tuple):
+            return dict(zip(SQLITE_COLUMNS, product))
+        return product
+
+    def get_product(self, product_id):
+        with span("service.lookup"):
+            return self.to_json(self.lookup.get(product_id))
+
+    def scan(self, image_bytes):
+        with span("service.scan"):
+            code = self.decoder.decode_first(load_grayscale(BytesIO(image_bytes)))
+            if code is None:
+                return None, None
+            product_id = self.parse_id(code)
+            return code, self.get_product(product_id) if product_id is not None else None
+
+    def scan_batch(self, archive_bytes):
+        with span("service.scan_batch"):
+            with zipfile.ZipFile(BytesIO(archive_bytes)) as archive:
+                items = [
+                    (info.filename, archive.read(info))
+                    for info in archive.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+                ]
+            if self.batch_scanner is not None and len(items) > 1:
+                scanned = list(self.batch_scanner.scan(items))
+            else:
+                scanned = [self._decode(name, data) for name, data in items]
+
+            # Uma única consulta em lote para todos os IDs lidos
+            ids = {self.parse_id(code) for r in scanned for code in r["results"]} - {None}
+            products = self.lookup.get_many(ids)
+            return [{
+                "name": r["name"],
+                "codes": r["results"],
+                "products": [
+                    self.to_json(products[self.parse_id(code)])
+                    for code in r["results"] if self.parse_id(code) in products
+                ],
+                "error": r["error"],
+            } for r in sorted(scanned, key=lambda r: r["name"])]
+
+    def _decode(self, name, data):
+        try:
+            return {"name": name, "results": self.decoder.decode(load_grayscale(BytesIO(data))), "error": None}
+        except Exception as e:
+            return {"name": name, "results": [], "error": str(e)}
+
+
+class ScanRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, body, content_type="application/json"):
+        if content_type == "application/json":
+            body = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self, limit):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > limit:
+            # O corpo não é lido: a conexão não pode ser reaproveitada
+            self.close_connection = True
+        if length <= 0:
+            self._send(400, {"error": "Corpo da requisição vazio"})
+            return None
+        if length > limit:
+            self._send(413, {"error": "Corpo da requisição grande demais"})
+            return None
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        service = self.server.service
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._send(200, registry.prometheus_text().encode("utf-8"), "text/plain")
+        elif path.startswith("/products/"):
+            product_id = service.parse_id(unquote(path[len("/products/"):]))
+            product = service.get_product(product_id) if product_id is not None else None
+            if product is None:
+                self._send(404, {"error": "Produto não encontrado"})
+            else:
+                self._send(200, product)
+        else:
+            self._send(404, {"error": "Rota não encontrada"})
+
+    def do_POST(self):
+        service = self.server.service
+        path = self.path.split("?", 1)[0]
+        try:
+            if path == "/scan":
+                body = self._read_body(MAX_IMAGE_BYTES)
+                if body is None:
+                    return
+                code, product = service.scan(body)
+                if code is None:
+                    self._send(422, {"error": "Nenhum QR Code encontrado na imagem"})
+                elif product is None:
+                    self._send(404, {"code": code, "error": "Produto não encontrado"})
+                else:
+                    self._send(200, {"code": code, "product": product})
+            elif path == "/scan/batch":
+                body = self._read_body(MAX_BATCH_BYTES)
+                if body is None:
+                    return
+                self._send(200, {"results": service.scan_batch(body)})
+            else:
+                self._send(404, {"error": "Rota não encontrada"})
+        except (OSError, zipfile.BadZipFile) as e:
+            self._send(400, {"error": f"Arquivo inválido: {str(e)}"})
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ScanServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, ScanRequestHandler)
+        self.service = service
+
+
+def build_lookup(args, cache):
+    if args.backend == "sqlite":
+        from sqlite_pool import ConnectionPool
+        return SQLiteProductLookup(ConnectionPool(args.db, size=args.db_pool_size), cache)
+
+    from supabase import create_client
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    return SupabaseProductLookup(InstrumentedSupabase(client), cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP de leitura de QR Code e consulta de produtos")
+    parser.add_argument("--backend", choices=["sqlite", "supabase"], default="sqlite")
+    parser.add_argument("--db", default="products.db", help="banco SQLite (backend sqlite)")
+    parser.add_argument("--db-pool-size", type=int, default=8)
+    parser.add_argument("--numeric-ids", action="store_true", help="IDs inteiros (base do app.py)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--cache-entries", type=int, default=2048)
+    parser.add_argument("--cache-ttl", type=int, default=300, help="validade do cache de produtos (segundos)")
+    parser.add_argument("--batch-workers", type=int, default=None, help="processos para /scan/batch")
+    args = parser.parse_args()
+
+    cache = ProductCache(max_entries=args.cache_entries, ttl=args.cache_ttl)
+    service = ScanService(
+        build_lookup(args, cache),
+        numeric_ids=args.numeric_ids,
+        batch_scanner=BatchScanner(max_workers=args.batch_workers)
+    )
+    server = ScanServer((args.host, args.port), service)
+    print(f"Serviço de leitura em http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.batch_scanner.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+-- Índices para a paginação por keyset da listagem de produtos (executar no SQL Editor do Supabase)
+create index if not exists products_creation_date_id_idx
+    on products (creation_date desc, id desc);
+
+-- Filtro por categoria do app.py
+create index if not exists products_category_creation_date_id_idx
+    on products (category, creation_date desc, id desc);
@@ -0,0 +1,22 @@
+-- Contador de IDs por categoria, usado pelo alocador de blocos do app.py (executar no SQL Editor do Supabase)
+create table if not exists product_id_counters (
+    category text primary key,
+    next_id bigint not null
+);
+
+-- Inicializa os contadores a partir dos produtos já cadastrados
+insert into product_id_counters (category, next_id)
+select category, max(id) + 1 from products group by category
+on conflict (category) do nothing;
+
+-- Reserva atomicamente um bloco de p_count IDs e devolve o primeiro.
+-- p_start é o primeiro ID da categoria, usado quando ela ainda não tem contador.
+create or replace function reserve_product_ids(p_category text, p_count integer, p_start bigint)
+returns bigint
+language sql
+as $$
+    insert into product_id_counters as c (category, next_id)
+    values (p_category, p_start + p_count)
+    on conflict (category) do update set next_id = c.next_id + p_count
+    returning next_id - p_count;
+$$;
@@ -0,0 +1,3 @@
+-- URLs das variantes reduzidas da imagem do produto (executar no SQL Editor do Supabase)
+alter table products add column if not exists thumbnail_url text;
+alter table products add column if not exists medium_url text;
@@ -0,0 +1,5 @@
+-- Imagens endereçadas pelo conteúdo (image_store.py): vários produtos podem apontar para a mesma
+-- image_url, e a exclusão conta as referências restantes antes de remover os objetos do bucket.
+-- Índice para essa contagem (executar no SQL Editor do Supabase)
+create index if not exists products_image_url_idx
+    on products (image_url);
@@ -0,0 +1,54 @@
+-- Busca textual da listagem (product_search.py): full-text com prefixo sobre nome e descrição,
+-- mais trigramas no nome para erros de digitação (executar no SQL Editor do Supabase)
+create extension if not exists unaccent;
+create extension if not exists pg_trgm;
+
+-- unaccent não é immutable; o wrapper permite usá-lo no índice
+create or replace function immutable_unaccent(value text)
+returns text
+language sql immutable parallel safe
+as $$
+    select public.unaccent('public.unaccent', value);
+$$;
+
+-- Documento de busca: nome com peso A, descrição com peso B. Configuração 'simple' (sem stemming)
+-- para que a busca por prefixo case com o que foi digitado.
+create or replace function products_search_vector(name text, description text)
+returns tsvector
+language sql immutable parallel safe
+as $$
+    select setweight(to_tsvector('simple', immutable_unaccent(coalesce(name, ''))), 'A')
+        || setweight(to_tsvector('simple', immutable_unaccent(coalesce(description, ''))), 'B');
+$$;
+
+create index if not exists products_search_idx
+    on products using gin (products_search_vector(name, description));
+
+create index if not exists products_name_trgm_idx
+    on products using gin (immutable_unaccent(lower(name)) gin_trgm_ops);
+
+-- Página do resultado ordenada por relevância; nos empates, na ordem da listagem (mais recentes
+-- primeiro). Todos os termos casam por prefixo ("cami:*").
+-- p_category é opcional; é lido via jsonb para a função servir também à tabela sem categoria
+-- do app_supabase.py.
+create or replace function search_products(p_query text, p_category text default null,
+                                           p_limit integer default 20, p_offset integer default 0)
+returns setof products
+language sql stable
+as $$
+    with q as (
+        select to_tsquery('simple', string_agg(quote_literal(term) || ':*', ' & ')) as tsq,
+               immutable_unaccent(lower(p_query)) as text
+        from regexp_split_to_table(immutable_unaccent(lower(p_query)), '\W+') as term
+        where term <> ''
+    )
+    select p.*
+    from products p, q
+    where (products_search_vector(p.name, p.description) @@ q.tsq
+           or immutable_unaccent(lower(p.name)) % q.text)
+      and (p_category is null or to_jsonb(p) ->> 'category' = p_category)
+    order by ts_rank(products_search_vector(p.name, p.description), q.tsq)
+             + similarity(immutable_unaccent(lower(p.name)), q.text) desc,
+             p.creation_date desc, p.id desc
+    limit p_limit offset p_offset;
+$$;
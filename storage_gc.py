@@ -0,0 +1,146 @@
+# Varredura de objetos órfãos no bucket de produtos.
+#
+# Lista todos os objetos do bucket (raiz e pasta images/ do image_store.py), percorre a tabela
+# products em páginas de keyset para montar o conjunto de caminhos referenciados (imagem,
+# variantes e QR Code) e remove, em blocos, o que não é referenciado por nenhum produto.
+# Objetos mais novos que min_age são ignorados: o cadastro envia os arquivos antes de a linha
+# existir. Com dry_run, só devolve o relatório.
+#
+# Uso (de um cron, por exemplo):
+#   SUPABASE_URL=... SUPABASE_KEY=... BUCKET_NAME=... python storage_gc.py            # simulação
+#   SUPABASE_URL=... SUPABASE_KEY=... BUCKET_NAME=... python storage_gc.py --apply
+import argparse
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from bulk_delete import REMOVE_CHUNK
+from image_store import IMAGE_COLUMNS, IMAGE_PREFIX, object_path
+from metrics import span
+
+
+LIST_PAGE_SIZE = 1000
+TABLE_PAGE_SIZE = 1000
+
+# Pastas do bucket varridas ("" é a raiz)
+FOLDERS = ("", IMAGE_PREFIX)
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class StorageSweeper:
+    def __init__(self, client, bucket_name, min_age=timedelta(hours=1)):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.min_age = min_age
+
+    # (caminho, tamanho, criado_em) de cada arquivo das pastas varridas; pastas são ignoradas
+    def iter_objects(self):
+        bucket = self.client.storage.from_(self.bucket_name)
+        for folder in FOLDERS:
+            offset = 0
+            while True:
+                entries = bucket.list(folder, {"limit": LIST_PAGE_SIZE, "offset": offset,
+                                               "sortBy": {"column": "name", "order": "asc"}})
+                for entry in entries:
+                    if entry.get("id") is None:
+                        continue
+                    path = f"{folder}/{entry['name']}" if folder else entry["name"]
+                    yield path, (entry.get("metadata") or {}).get("size", 0), _parse_time(entry.get("created_at"))
+                if len(entries) < LIST_PAGE_SIZE:
+                    break
+                offset += LIST_PAGE_SIZE
+
+    # Caminhos referenciados pela tabela products, lida em páginas por ID
+    def referenced_paths(self):
+        columns = IMAGE_COLUMNS + ("qr_code_url",)
+        referenced = set()
+        last_id = None
+        while True:
+            query = self.client.table('products').select(",".join(("id",) + columns))
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(TABLE_PAGE_SIZE).execute().data
+            for row in rows:
+                referenced.update(object_path(row[column], self.bucket_name) for column in columns if row.get(column))
+            if len(rows) < TABLE_PAGE_SIZE:
+                return referenced
+            last_id = rows[-1]["id"]
+
+    # Quais dos caminhos são referenciados agora por algum produto. As URLs são montadas com o
+    # mesmo get_public_url dos cadastros, então a comparação com as colunas é exata.
+    def referenced_among(self, paths, chunk_size=200):
+        bucket = self.client.storage.from_(self.bucket_name)
+        by_url = {bucket.get_public_url(path): path for path in paths}
+        urls = list(by_url)
+        referenced = set()
+        for column in IMAGE_COLUMNS + ("qr_code_url",):
+            for start in range(0, len(urls), chunk_size):
+                rows = self.client.table('products') \
+                    .select(column) \
+                    .in_(column, urls[start:start + chunk_size]) \
+                    .execute() \
+                    .data
+                referenced.update(by_url[row[column]] for row in rows)
+        return referenced
+
+    def sweep(self, dry_run=True):
+        with span("storage_gc.sweep", dry_run=dry_run):
+            referenced = self.referenced_paths()
+            cutoff = datetime.now(timezone.utc) - self.min_age
+            objects = 0
+            recent = 0
+            orphans = []
+            orphan_bytes = 0
+            sizes = {}
+            for path, size, created_at in self.iter_objects():
+                objects += 1
+                if path in referenced:
+                    continue
+                if created_at is not None and created_at > cutoff:
+                    recent += 1
+                    continue
+                orphans.append(path)
+                orphan_bytes += size
+                sizes[path] = size
+
+            if not dry_run and orphans:
+                # Produtos gravados durante a varredura (por exemplo, reaproveitando uma imagem
+                # órfã já existente) não estão em referenced: confere de novo antes de remover
+                still_referenced = self.referenced_among(orphans)
+                removable = [path for path in orphans if path not in still_referenced]
+                bucket = self.client.storage.from_(self.bucket_name)
+                for start in range(0, len(removable), REMOVE_CHUNK):
+                    bucket.remove(removable[start:start + REMOVE_CHUNK])
+                orphans = removable
+                orphan_bytes -= sum(sizes[path] for path in still_referenced)
+
+        return {
+            "dry_run": dry_run,
+            "objects": objects,
+            "referenced": len(referenced),
+            "recent_skipped": recent,
+            "orphans": orphans,
+            "orphan_bytes": orphan_bytes,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove do bucket os objetos sem produto")
+    parser.add_argument("--apply", action="store_true", help="remove os órfãos (sem isso, só simula)")
+    parser.add_argument("--min-age-hours", type=float, default=1.0, help="ignora objetos mais novos que isso")
+    args = parser.parse_args()
+
+    from supabase import create_client
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    sweeper = StorageSweeper(client, os.environ["BUCKET_NAME"], min_age=timedelta(hours=args.min_age_hours))
+    report = sweeper.sweep(dry_run=not args.apply)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Leitura contínua de QR Codes em vídeo (arquivo gravado, stream MJPEG/RTSP ou câmera).
+#
+# O custo de CPU por segundo de vídeo fica limitado por:
+#   - taxa máxima de quadros decodificados (max_fps); os demais são descartados com grab(),
+#     sem conversão de cor;
+#   - descarte de quadros quase iguais ao último decodificado (diferença média numa miniatura);
+#   - depois da primeira detecção, busca primeiro na região de interesse (ROI) em volta do
+#     último QR Code, que acompanha o movimento; o quadro inteiro só é varrido quando o
+#     código sai da ROI;
+#   - quadros grandes reduzidos para max_width antes da decodificação.
+# O mesmo ID só é reportado de novo depois de ficar repeat_window segundos fora de vista.
+#
+# Qualquer iterável de (timestamp_s, quadro) serve de fonte, por exemplo quadros de uma
+# trilha WebRTC; iter_frames() cobre o que o OpenCV abre.
+#
+# Uso offline, com um vídeo gravado:
+#   python video_scan.py gravacao.mp4 --fps 8
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from metrics import span
+from qr_decoder import get_decoder
+
+
+# Lê quadros de um arquivo, URL ou índice de câmera, no máximo max_fps por segundo de vídeo.
+# Em arquivos o relógio é o do próprio vídeo (reprodutível); em fontes ao vivo, o relógio de parede.
+# max_seconds encerra a leitura depois desse tempo (no relógio da fonte).
+def iter_frames(source, max_fps=8, max_seconds=None):
+    capture = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not capture.isOpened():
+        raise IOError(f"Não foi possível abrir a fonte de vídeo: {source}")
+
+    video_fps = capture.get(cv2.CAP_PROP_FPS) or 0
+    frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    is_file = frame_count > 0 and video_fps > 0
+    interval = 1.0 / max_fps if max_fps else 0.0
+    started = time.monotonic()
+    next_due = 0.0
+    index = -1
+    try:
+        while capture.grab():
+            index += 1
+            timestamp = index / video_fps if is_file else time.monotonic() - started
+            if max_seconds is not None and timestamp > max_seconds:
+                break
+            if timestamp < next_due:
+                continue
+            next_due = max(next_due + interval, timestamp)
+            ok, frame = capture.retrieve()
+            if ok:
+                yield timestamp, frame
+    finally:
+        capture.release()
+
+
+class VideoScanner:
+    def __init__(self, decoder=None, diff_threshold=2.0, roi_margin=0.5,
+                 repeat_window=3.0, max_width=1280, thumbnail_size=(64, 48)):
+        self.decoder = decoder or get_decoder()
+        # Diferença média de intensidade (0-255) abaixo da qual o quadro é considerado repetido
+        self.diff_threshold = diff_threshold
+        # Margem em volta do último QR Code, como fração do seu tamanho
+        self.roi_margin = roi_margin
+        self.repeat_window = repeat_window
+        self.max_width = max_width
+        self.thumbnail_size = thumbnail_size
+        self.reset()
+
+    def reset(self):
+        self._thumbnail = None
+        self._roi = None
+        self._last_seen = {}
+        self._visible = []
+        self.stats = {"frames": 0, "duplicates": 0, "decoded": 0, "roi_decodes": 0, "detections": 0}
+
+    def _gray(self, frame):
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.max_width and frame.shape[1] > self.max_width:
+            scale = self.max_width / frame.shape[1]
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return frame
+
+    def _is_duplicate(self, gray):
+        thumbnail = cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        previous, self._thumbnail = self._thumbnail, thumbnail
+        if previous is None:
+            return False
+        if float(np.mean(cv2.absdiff(thumbnail, previous))) < self.diff_threshold:
+            # Mantém a referência do último quadro realmente decodificado, para não
+            # deixar passar uma mudança lenta e contínua
+            self._thumbnail = previous
+            return True
+        return False
+
+    def _expand(self, box, shape):
+        x, y, w, h = box
+        mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(shape[1], x + w + mx), min(shape[0], y + h + my)
+        return x0, y0, x1, y1
+
+    def _decode(self, gray):
+        if self._roi is not None:
+            x0, y0, x1, y1 = self._roi
+            self.stats["roi_decodes"] += 1
+            regions = [(data, (x + x0, y + y0, w, h))
+                       for data, (x, y, w, h) in self.decoder.decode_regions(gray[y0:y1, x0:x1])]
+            if regions:
+                self._roi = self._expand(regions[0][1], gray.shape)
+                return regions
+
+        # Sem ROI, ou o QR Code saiu dela: o quadro mudou, então busca no quadro inteiro
+        regions = self.decoder.decode_regions(gray)
+        self._roi = self._expand(regions[0][1], gray.shape) if regions else None
+        return regions
+
+    # Gera {"code", "timestamp", "box"} para cada ID novo (ou que voltou depois de repeat_window).
+    # on_progress recebe stats a cada progress_every quadros, mesmo sem nenhuma leitura.
+    def scan(self, frames, on_progress=None, progress_every=16):
+        for timestamp, frame in frames:
+            self.stats["frames"] += 1
+            if on_progress and self.stats["frames"] % progress_every == 0:
+                on_progress(self.stats)
+            gray = self._gray(frame)
+            if self._is_duplicate(gray):
+                self.stats["duplicates"] += 1
+                # Quadro igual ao último decodificado: os mesmos códigos continuam em vista
+                for code in self._visible:
+                    self._last_seen[code] = timestamp
+                continue
+
+            self.stats["decoded"] += 1
+            with span("video.decode", roi=self._roi is not None):
+                regions = self._decode(gray)
+            self._visible = [code for code, _ in regions]
+
+            for code, box in regions:
+                last_seen = self._last_seen.get(code)
+                self._last_seen[code] = timestamp
+                if last_seen is None or timestamp - last_seen > self.repeat_window:
+                    self.stats["detections"] += 1
+                    yield {"code": code, "timestamp": timestamp, "box": box}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leitura contínua de QR Codes em vídeo")
+    parser.add_argument("source", help="arquivo de vídeo, URL do stream ou índice da câmera")
+    parser.add_argument("--fps", type=float, default=8, help="quadros decodificados por segundo de vídeo")
+    parser.add_argument("--repeat-window", type=float, default=3.0)
+    parser.add_argument("--max-width", type=int, default=1280)
+    args = parser.parse_args()
+
+    scanner = VideoScanner(repeat_window=args.repeat_window, max_width=args.max_width)
+    started = time.process_time()
+    for detection in scanner.scan(iter_frames(args.source, max_fps=args.fps)):
+        print(json.dumps({**detection, "box": [int(v) for v in detection["box"]]}, ensure_ascii=False))
+    print(json.dumps({**scanner.stats, "cpu_seconds": round(time.process_time() - started, 3)}))
+
+
+if __name__ == "__main__":
+    main()